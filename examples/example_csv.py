@@ -39,10 +39,13 @@ with open("input_file.csv", "r", newline="", encoding="utf-8") as inputf, open(
 
     # run our pipeline over csv rows
     pipeline.run_batch(
-        # convert csv rows to our RowInput class
+        # convert csv rows to our RowInput class.
+        # rows are read lazily, as requests complete, so memory use doesn't grow with the file size
         map(RowInput, reader),
         # on successful output, write the row in the output file with the topics and the summary text
         on_output=lambda input, output: writer.writerow(
             input.row_data + [";".join(output.topics.values), output.summary.text]
         ),
+        # don't keep outputs in memory, rows are written as they arrive
+        stream=True,
     )
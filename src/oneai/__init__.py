@@ -1,6 +1,7 @@
 __version__ = "0.9.89"
 __package__ = "oneai"
 
+import importlib
 import logging
 import oneai.logger
 from typing_extensions import Final
@@ -8,11 +9,20 @@ import oneai.skills as skills
 from oneai.classes import *
 from oneai.output import Output
 from oneai.pipeline import Pipeline
-import oneai.clustering as clustering
-import oneai.parsing as parsing
-import oneai.util as util
 import oneai.exceptions as exceptions
 
+# imported on first access, to keep `import oneai` fast
+_LAZY_MODULES = {"clustering", "parsing", "util"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_MODULES:
+        module = importlib.import_module(f"oneai.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module 'oneai' has no attribute '{name}'")
+
+
 URL: Final[str] = "https://api.oneai.com"
 """
 Base URL for the pipeline API. Only change if you know what you're doing.
@@ -33,6 +43,24 @@ MAX_CONCURRENT_REQUESTS: Final[int] = 2
 Max number of allowed concurrent requests to be made by the SDK.
 Currently only enforced on `pipeline.run_batch`, other calls may be limited by the API
 """
+MAX_REQUESTS_PER_SECOND = None
+"""
+Max rate of requests to be made by `pipeline.run_batch`, e.g. to stay within the rate limit of your API key. `None` for no limit.
+"""
+CACHE_SIZE = 1000
+"""
+Max number of responses kept by the in-memory response cache. Only used by pipelines with `cache_mode` enabled.
+"""
+STREAM_RESPONSES = False
+"""
+Parse pipeline responses while they are downloaded, instead of buffering the whole response body first.
+Reduces peak memory use for large responses. Requires the `ijson` package, ignored if it's not installed.
+"""
+COMPRESS_REQUESTS = False
+"""
+Compress large pipeline request bodies before sending them, with zstd if the `zstandard` package is installed, otherwise gzip.
+Reduces upload size for long inputs, at the cost of some CPU time. Requires API support for the `Content-Encoding` used.
+"""
 DEBUG_RAW_RESPONSES = False
 """
 Debug flag, return raw API responses instead of structured `Output` object. Only enable if you know what you're doing
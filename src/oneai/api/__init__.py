@@ -1,9 +1,4 @@
-from oneai.api.pipeline import post_pipeline
-from oneai.api.clustering import (
-    post_clustering,
-    get_clustering,
-    get_clustering_paginated,
-)
+import oneai
 
 
 def get_or_create_uuid() -> str:
@@ -19,3 +14,17 @@ def get_or_create_uuid() -> str:
 
 
 uuid = get_or_create_uuid()
+USER_AGENT = f"python-sdk/{oneai.__version__}/{uuid}"
+
+from oneai.api.pipeline import post_pipeline
+
+_CLUSTERING = {"post_clustering", "get_clustering", "get_clustering_paginated"}
+
+
+def __getattr__(name: str):
+    # the clustering API (and its dependency on requests) is only loaded when used
+    if name in _CLUSTERING:
+        from oneai.api import clustering
+
+        return getattr(clustering, name)
+    raise AttributeError(f"module 'oneai.api' has no attribute '{name}'")
@@ -1,16 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import json
+import logging
 import requests
+from requests.adapters import HTTPAdapter
 import urllib.parse
 from typing import Union, Callable, Any
 from typing_extensions import Literal
 import oneai, oneai.api
+from oneai.json_utils import dumps, loads, pretty
 
 
 API_DATE_FORMAT = "%Y-%m-%d"
 
 ENDPOINT = "clustering/v1/collections"
 
+TIMEOUT = (10, 6000)  # (connect, read) seconds
+
+# shared across calls, to reuse connections (keep-alive) for paginated requests
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_session.headers["User-Agent"] = oneai.api.USER_AGENT
+# for prefetching the next page of paginated requests
+_prefetch_pool = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="oneai-clustering"
+)
+
+
+def close_session():
+    """
+    Closes the pooled connections of the clustering API. New connections are opened by the next request.
+    """
+    _session.close()
+
+
+def build_headers(api_key: str = None) -> dict:
+    api_key = api_key or oneai.api_key
+    if not api_key:
+        raise Exception("API key is required")
+    return {
+        "api-key": api_key,
+        "Content-Type": "application/json",
+    }
+
+
+def format_date(date: Union[datetime, str], date_format: str = API_DATE_FORMAT) -> str:
+    if isinstance(date, str):
+        date = datetime.strptime(date, date_format)
+    # same as `date.strftime(API_DATE_FORMAT)` for 4-digit years, without the locale-aware strftime
+    return "%04d-%02d-%02d" % (date.year, date.month, date.day)
+
+
+def read_body(response: requests.Response) -> bytes:
+    # parsed as is, transcoded to UTF-8 only if the response declares a different charset
+    # (`response.encoding` falls back to a default when none is declared)
+    encoding = response.encoding
+    if (
+        "charset" not in response.headers.get("Content-Type", "").lower()
+        or encoding is None
+        or encoding.lower() in ("utf-8", "utf8")
+    ):
+        return response.content
+    return response.content.decode(encoding).encode("utf-8")
+
 
 def build_query_params(
     sort: Literal["ASC", "DESC"] = None,
@@ -20,25 +71,20 @@ def build_query_params(
     date_format: str = API_DATE_FORMAT,
     item_metadata: str = None,
 ):
-    if from_date:
-        if isinstance(from_date, str):
-            from_date = datetime.strptime(from_date, date_format)
-        from_date = from_date.strftime(API_DATE_FORMAT)
-
-    if to_date:
-        if isinstance(to_date, str):
-            to_date = datetime.strptime(to_date, date_format)
-        to_date = to_date.strftime(API_DATE_FORMAT)
-
-    params = {
-        "sort": sort,
-        "limit": limit if limit else 20,
-        "from-date": from_date,
-        "to-date": to_date,
-        "item-metadata": item_metadata,
-        "translate": True,
-    }
-    return {k: v for k, v in params.items() if v is not None}
+    params = {}
+    if sort is not None:
+        params["sort"] = sort
+    params["limit"] = limit if limit else 20
+    if from_date is not None:
+        params["from-date"] = (
+            format_date(from_date, date_format) if from_date else from_date
+        )
+    if to_date is not None:
+        params["to-date"] = format_date(to_date, date_format) if to_date else to_date
+    if item_metadata is not None:
+        params["item-metadata"] = item_metadata
+    params["translate"] = True
+    return params
 
 
 def get_clustering_paginated(
@@ -57,60 +103,73 @@ def get_clustering_paginated(
     params = build_query_params(
         sort, limit, from_date, to_date, date_format, item_metadata
     )
-    page = 0
+    headers = build_headers(api_key)  # same for all pages
+    page = params["page"] = 0
     counter = 0
-    results = [None]
 
-    while results and ((not limit) or counter < limit):
-        params["page"] = page
-        response = get_clustering(path, params, api_key)
-        results = [
-            (from_dict(parent, result) if parent else from_dict(result))
-            for result in response[result_key]
-        ]
-        yield from results
-        counter += len(results)
-        page += 1
+    # each page is requested in the background while the previous one is consumed
+    future = _prefetch_pool.submit(get_clustering, path, dict(params), headers=headers)
+    try:
+        while future is not None:
+            response = future.result()
+            future = None
+            results = [
+                (from_dict(parent, result) if parent else from_dict(result))
+                for result in response[result_key]
+            ]
+            counter += len(results)
 
-        if page >= response.get("total_pages", 0):
-            break
+            if results and ((not limit) or counter < limit):
+                page += 1
+                params["page"] = page
+                if page < response.get("total_pages", 0):
+                    future = _prefetch_pool.submit(
+                        get_clustering, path, dict(params), headers=headers
+                    )
+            yield from results
+    finally:
+        # the generator was closed before the prefetched page was used
+        if future is not None:
+            future.cancel()
 
 
-def get_clustering(path: str, params: dict, api_key: str = None):
-    api_key = api_key or oneai.api_key
-    if not api_key:
-        raise Exception("API key is required")
-    headers = {
-        "api-key": api_key,
-        "Content-Type": "application/json",
-        "User-Agent": f"python-sdk/{oneai.__version__}/{oneai.api.uuid}",
-    }
-    if oneai.DEBUG_LOG_REQUESTS:
-        oneai.logger.debug(f"GET {oneai.URL}/{ENDPOINT}/{path}\n")
-        oneai.logger.debug(f"headers={json.dumps(headers, indent=4)}\n")
-        oneai.logger.debug(f"params={json.dumps(params, indent=4)}\n")
-    response = requests.get(
+def get_clustering(
+    path: str, params: dict, api_key: str = None, *, headers: dict = None
+):
+    headers = headers or build_headers(api_key)
+    if oneai.DEBUG_LOG_REQUESTS and oneai.logger.isEnabledFor(logging.DEBUG):
+        oneai.logger.debug(
+            "GET %s/%s/%s\nheaders=%s\nparams=%s\n",
+            oneai.URL,
+            ENDPOINT,
+            path,
+            pretty(headers),
+            pretty(params),
+        )
+    response = _session.get(
         f"{oneai.URL}/{ENDPOINT}/{path}",
         headers=headers,
         params=params,
+        timeout=TIMEOUT,
     )
-    return json.loads(response.content)
+    return loads(read_body(response))
 
 
 def post_clustering(path: str, data: dict, api_key: str = None):
-    api_key = api_key or oneai.api_key
-    if not api_key:
-        raise Exception("API key is required")
-    headers = {
-        "api-key": api_key,
-        "Content-Type": "application/json",
-        "User-Agent": f"python-sdk/{oneai.__version__}/{oneai.api.uuid}",
-    }
-    if oneai.DEBUG_LOG_REQUESTS:
-        oneai.logger.debug(f"POST {oneai.URL}/{ENDPOINT}/{path}\n")
-        oneai.logger.debug(f"headers={json.dumps(headers, indent=4)}\n")
-        oneai.logger.debug(f"data={json.dumps(data, indent=4)}\n")
-    response = requests.post(
-        f"{oneai.URL}/{ENDPOINT}/{path}", headers=headers, json=data
+    headers = build_headers(api_key)
+    if oneai.DEBUG_LOG_REQUESTS and oneai.logger.isEnabledFor(logging.DEBUG):
+        oneai.logger.debug(
+            "POST %s/%s/%s\nheaders=%s\ndata=%s\n",
+            oneai.URL,
+            ENDPOINT,
+            path,
+            pretty(headers),
+            pretty(data),
+        )
+    response = _session.post(
+        f"{oneai.URL}/{ENDPOINT}/{path}",
+        headers=headers,
+        data=dumps(data),
+        timeout=TIMEOUT,
     )
-    return json.loads(response.content)
+    return loads(read_body(response))
@@ -1,11 +1,54 @@
+from collections import defaultdict
 from dataclasses import replace
-from typing import List
+from typing import Dict, List, Tuple
 
 import oneai
 from oneai.classes import Label, Labels, Skill, Utterance, TextContent
 from oneai.output import Output
 
 
+def labels_clone(skill: Skill) -> Skill:
+    # a copy of a generator Skill that only produces its labels, cached on the Skill between responses.
+    # the clone shares the params of the Skill, so it's only replaced if the params object itself is replaced
+    clone = getattr(skill, "_labels_clone", None)
+    if (
+        clone is None
+        or clone.params is not skill.params
+        or clone.api_name != skill.api_name
+        or clone.labels_attr != skill.labels_attr
+    ):
+        clone = replace(skill)
+        object.__setattr__(clone, "text_attr", None)
+        object.__setattr__(clone, "params", skill.params)
+        object.__setattr__(skill, "_labels_clone", clone)
+    return clone
+
+
+def group_labels(raw_labels: List[dict]) -> Tuple[List[Label], Dict[str, List[Label]]]:
+    # parse labels and group them by skill in a single pass, instead of scanning all labels per skill
+    labels = []
+    by_skill = defaultdict(list)
+    from_dict = Label.from_dict
+    for raw in raw_labels:
+        label = from_dict(raw)
+        labels.append(label)
+        by_skill[label.skill].append(label)
+    return labels, by_skill
+
+
+def skill_labels(
+    skill: Skill, labels: List[Label], by_skill: Dict[str, List[Label]]
+) -> Labels:
+    # startswith instead of strict equality to handle subskills
+    matches = [k for k in by_skill if skill.api_name.startswith(k)]
+    if not matches:
+        return Labels()
+    if len(matches) == 1:
+        return Labels(by_skill[matches[0]])
+    # labels of multiple groups, keep their original order
+    return Labels(label for label in labels if skill.api_name.startswith(label.skill))
+
+
 def build_output(
     skills: List[Skill],
     raw_output: dict,
@@ -13,15 +56,12 @@ def build_output(
 ) -> Output:
     if oneai.DEBUG_RAW_RESPONSES:
         return raw_output
+    raw_outputs = raw_output.get("output")
 
     def get_text(index) -> TextContent:
         # get the input text for this Output object. use index=-1 to get the original input text
         # text can be returned as a simple str or parsed to match a given input type
-        text = (
-            raw_output["output"][index]["contents"]
-            if index >= 0
-            else raw_output["input"]
-        )
+        text = raw_outputs[index]["contents"] if index >= 0 else raw_output["input"]
 
         if not text:
             return ""
@@ -34,9 +74,7 @@ def build_output(
         first, second = skills[: i + 1], skills[i + 1 :]
         if skills[i].labels_attr:
             # handle skills that create both text and labels
-            clone = replace(skills[i])
-            object.__setattr__(clone, "text_attr", None)
-            second = (clone, *second)
+            second = (labels_clone(skills[i]), *second)
         return first, second
 
     def build_internal(
@@ -44,35 +82,38 @@ def build_output(
         skills: List[Skill],
         headers: dict = {},
     ) -> "Output":
-        text = get_text(output_index)
-        # temporary fix- if 1st skill is not a generator, use input_text, not output[0].text,
-        # since output[0].text is corrupted (not parsable) for conversation inputs
-        output_index = max(output_index, 0)
-        labels = [
-            Label.from_dict(label)
-            for label in raw_output["output"][output_index].get("labels", [])
-        ]
-        data = []
-        for i, skill in enumerate(skills):
-            if skill.text_attr:
-                skills, next_skills = split_pipeline(skills, i)
-                data.append(build_internal(output_index + 1, next_skills))
+        # an Output per generator Skill, built iteratively- collect the levels top-down, then link them bottom-up
+        levels = []
+        while True:
+            text = get_text(output_index)
+            # temporary fix- if 1st skill is not a generator, use input_text, not output[0].text,
+            # since output[0].text is corrupted (not parsable) for conversation inputs
+            output_index = max(output_index, 0)
+            labels, by_skill = group_labels(raw_outputs[output_index].get("labels", []))
+            # Skills after the first generator are built from the next output,
+            # find it once rather than checking on every Skill
+            split = next(
+                (i for i, skill in enumerate(skills) if skill.text_attr), len(skills)
+            )
+            data = [skill_labels(skill, labels, by_skill) for skill in skills[:split]]
+            if split == len(skills):
+                levels.append((text, skills, data, headers))
                 break
-            else:
-                data.append(
-                    Labels(
-                        label
-                        for label in labels
-                        # startswith instead of strict equality to handle subskills
-                        if skill.api_name.startswith(label.skill)
-                    )
-                )
-        return Output(
-            text=text,
-            skills=list(skills),
-            data=data,
-            task_id=headers.get("x-oneai-request-id"),
-        )
+            skills, next_skills = split_pipeline(skills, split)
+            levels.append((text, skills, data, headers))
+            output_index, skills, headers = output_index + 1, next_skills, {}
+
+        output = None
+        for text, skills, data, headers in reversed(levels):
+            if output is not None:
+                data.append(output)
+            output = Output(
+                text=text,
+                skills=list(skills),
+                data=data,
+                task_id=headers.get("x-oneai-request-id"),
+            )
+        return output
 
     # handle output lists
     if "outputs" in raw_output:
@@ -82,7 +123,7 @@ def build_output(
             task_id=headers.get("x-oneai-request-id"),
         )
 
-    generator = raw_output["output"][0].get("text_generated_by_step_id", 0) - 1
+    generator = raw_outputs[0].get("text_generated_by_step_id", 0) - 1
     if generator < 0:
         return build_internal(-1, skills, headers)
     else:
@@ -1,21 +1,120 @@
-from datetime import timedelta
+import asyncio
+import atexit
+import gzip
+from hashlib import blake2b
 import io
-import json
+import logging
 import urllib.parse
-from typing import Awaitable, List
+import weakref
+from typing import Awaitable, List, TYPE_CHECKING
+from typing_extensions import Literal
 
-import aiohttp
 import oneai, oneai.api
 from oneai.api.output import build_output
-from oneai.classes import Input, Skill, CSVParams
+from oneai.cache import response_cache
+from oneai.classes import Input, Skill, CSVParams, _json_default
 from oneai.output import Output
 from oneai.exceptions import handle_unsuccessful_response, validate_api_key
+from oneai.json_utils import dumps, loads, ijson, pretty
+
+if TYPE_CHECKING:
+    import aiohttp
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, see `oneai[compression]`
+    zstandard = None
 
 endpoint_default = "api/v0/pipeline"
 endpoint_async = "api/v0/pipeline/async"
 endpoint_async_file = "api/v0/pipeline/async/file"
 endpoint_async_tasks = "api/v0/pipeline/async/tasks"
 
+CacheMode = Literal["on", "read_only", "write_only", "off"]
+# smaller request bodies are sent as is, even with `oneai.COMPRESS_REQUESTS`
+COMPRESS_MIN_SIZE = 4096
+PREFIX_CACHE_RATIO = 0.9  # portion of the input text hashed as its reusable prefix
+
+# client sessions are bound to an event loop, so we keep one per loop
+_sessions = (
+    weakref.WeakKeyDictionary()
+)  # AbstractEventLoop -> (ClientSession, AsyncGenerator)
+
+
+async def _close_on_shutdown(session: "aiohttp.ClientSession"):
+    # an async generator rather than a pending task: the loop closes it in `shutdown_asyncgens`
+    # (called by asyncio.run, and by the shutdown of the sync background loop), closing the session.
+    # a loop closed without shutting down isn't left with a pending task
+    try:
+        yield
+    finally:
+        loop = asyncio.get_running_loop()
+        # the entry (session and generator) references the loop, so it has to be removed explicitly
+        if _sessions.get(loop, (None, None))[0] is session:
+            del _sessions[loop]
+        await session.close()
+
+
+def _start(agen):
+    # runs an async generator up to its first yield, which registers it with the running loop
+    try:
+        agen.asend(None).send(None)
+    except StopIteration:
+        pass
+
+
+def get_session() -> "aiohttp.ClientSession":
+    """
+    Returns the client session shared by all SDK requests on the running event loop, creating it on first use.
+    Reusing the session keeps connections (and TLS sessions) alive between requests.
+    """
+    loop = asyncio.get_running_loop()
+    session, closer = _sessions.get(loop, (None, None))
+    if session is None or session.closed:
+        # the session was closed by the user, drop its keeper
+        if closer is not None:
+            loop.create_task(closer.aclose())
+        import aiohttp  # imported on first use, it's slow to import
+
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=32,
+                keepalive_timeout=75,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+            ),
+            timeout=aiohttp.ClientTimeout(total=6000, connect=10),
+            # sent with every request, rather than building it into each request's headers
+            headers={"User-Agent": oneai.api.USER_AGENT},
+        )
+        closer = _close_on_shutdown(session)
+        _start(closer)
+        _sessions[loop] = (session, closer)
+    return session
+
+
+async def close_session():
+    """
+    Closes the shared client session of the running event loop, if one was created.
+    """
+    _, closer = _sessions.pop(asyncio.get_running_loop(), (None, None))
+    if closer is not None:
+        await closer.aclose()  # closes the session
+
+
+@atexit.register
+def _close_sessions():
+    # loops left open by the user- close the session keepers, which close the sessions
+    for loop, (_, closer) in list(_sessions.items()):
+        if not loop.is_closed() and not loop.is_running():
+            loop.run_until_complete(closer.aclose())
+
+
+def serialize_steps(steps: List[Skill]) -> bytes:
+    # from each skill's cached JSON, encoded with the same default hook as the rest of the request
+    return b"[" + b",".join(skill._json() for skill in steps) + b"]"
+
 
 def build_request(
     input: Input,
@@ -23,28 +122,27 @@ def build_request(
     multilingual: bool,
     include_text: bool,
     csv_params: CSVParams = None,
+    steps_json: bytes = None,
 ):
-    def json_default(obj):
-        if isinstance(obj, timedelta):
-            return str(obj)
-        if isinstance(obj, Skill):
-            return obj.api_name
-        return {k: v for k, v in obj.__dict__.items() if v is not None}
-
     # use input metadata for clustering
+    clustering_index = None
     if hasattr(input, "metadata"):
-        for skill in steps:
+        for i, skill in enumerate(steps):
             if skill.api_name == "clustering":
                 skill.params["user_metadata"] = input.metadata
+                clustering_index = i
                 break
 
+    # steps can be serialized once for many inputs, see Pipeline._serialize_steps
+    if steps_json is None or clustering_index is not None:
+        steps_json = serialize_steps(steps)
+
     request = {
-        "steps": [skill.asdict() for skill in steps],
         "output_type": "json",
         "multilingual": multilingual,
     }
     if include_text:
-        request["input"] = input.text
+        request["input"] = input._text_json()
     if csv_params is not None:
         request["csv_params"] = {
             k: v for k, v in csv_params.asdict().items() if v is not None
@@ -55,98 +153,186 @@ def build_request(
         request["content_type"] = input.content_type
     if hasattr(input, "encoding") and input.encoding:
         request["encoding"] = input.encoding
-    return json.dumps(request, default=json_default)
+    # splice the serialized steps into the request, rather than serializing them again
+    return b'{"steps":' + steps_json + b"," + dumps(request, default=_json_default)[1:]
+
+
+def prefix_cache_headers(input: Input) -> dict:
+    # allow the API to reuse its processing of a long input, when the same text is sent repeatedly
+    headers = {"X-OneAI-Prefix-Cache": "1"}
+    text = input.text
+    if isinstance(text, list):
+        text = "\n".join(getattr(u, "utterance", "") for u in text)
+    if isinstance(text, str):
+        prefix = text[: int(len(text) * PREFIX_CACHE_RATIO)]
+        headers["X-OneAI-Prefix-Hash"] = blake2b(
+            prefix.encode("utf-8"), digest_size=16
+        ).hexdigest()
+    return headers
+
+
+def compress_request(request: bytes, headers: dict) -> bytes:
+    if not oneai.COMPRESS_REQUESTS or len(request) < COMPRESS_MIN_SIZE:
+        return request
+    if zstandard is not None:
+        headers["Content-Encoding"] = "zstd"
+        return zstandard.ZstdCompressor(level=3).compress(request)
+    headers["Content-Encoding"] = "gzip"
+    return gzip.compress(request, compresslevel=6)
+
+
+def is_utf8(charset: str) -> bool:
+    return charset is None or charset.lower() in ("utf-8", "utf8")
+
+
+async def read_body(response: "aiohttp.ClientResponse") -> bytes:
+    # the raw body is parsed as is (orjson parses UTF-8 bytes directly), transcoded only if declared otherwise
+    body = await response.read()
+    if not is_utf8(response.charset):
+        body = body.decode(response.charset).encode("utf-8")
+    return body
+
+
+async def read_streamed(response: "aiohttp.ClientResponse") -> dict:
+    # parse the top-level fields of the response as its chunks arrive, so the raw body is never held in memory
+    raw_output = {}
+    fields = ijson.sendable_list()
+    parser = ijson.kvitems_coro(fields, "", use_float=True)
+    async for chunk in response.content.iter_chunked(65536):
+        parser.send(chunk)
+        raw_output.update(fields)
+        del fields[:]
+    parser.close()
+    raw_output.update(fields)
+    return raw_output
 
 
 async def post_pipeline(
-    session: aiohttp.ClientSession,
+    session: "aiohttp.ClientSession",
     input: Input,
     steps: List[Skill],
     api_key: str,
     multilingual: bool,
     csv_params: CSVParams = None,
+    cache_mode: CacheMode = "off",
+    steps_json: bytes = None,
+    prefix_cache: bool = False,
 ) -> Output:
     validate_api_key(api_key)
 
-    request = build_request(input, steps, multilingual, True, csv_params)
+    request = build_request(input, steps, multilingual, True, csv_params, steps_json)
     url = f"{oneai.URL}/{endpoint_default}"
+
+    cache_key = None
+    if cache_mode != "off":
+        cache_key = response_cache.key(url, request)
+    if cache_mode in ("on", "read_only"):
+        cached = response_cache.lookup(cache_key)
+        if cached is not None:
+            body, response_headers = cached
+            return build_output(steps, loads(body), response_headers)
+
     headers = {
         "api-key": api_key,
         "Content-Type": "application/json",
-        "User-Agent": f"python-sdk/{oneai.__version__}/{oneai.api.uuid}",
     }
+    if prefix_cache:
+        headers.update(prefix_cache_headers(input))
 
-    if oneai.DEBUG_LOG_REQUESTS:
-        oneai.logger.debug(f"POST {url}\n")
-        oneai.logger.debug(f"headers={json.dumps(headers, indent=4)}\n")
-        oneai.logger.debug(f"data={json.dumps(json.loads(request), indent=4)}\n")
+    if oneai.DEBUG_LOG_REQUESTS and oneai.logger.isEnabledFor(logging.DEBUG):
+        oneai.logger.debug(
+            "POST %s\nheaders=%s\ndata=%s\n", url, pretty(headers), pretty(request)
+        )
 
-    async with session.post(url, headers=headers, data=request) as response:
+    data = compress_request(request, headers)
+    async with session.post(url, headers=headers, data=data) as response:
         if response.status != 200:
             await handle_unsuccessful_response(response)
         else:
-            return build_output(steps, await response.json(), response.headers)
+            if oneai.DEBUG_RAW_RESPONSES:
+                # returned as is- skip streamed parsing, caching, and building the Output
+                return loads(await read_body(response))
+            elif (
+                oneai.STREAM_RESPONSES
+                and ijson is not None
+                and is_utf8(response.charset)
+            ):
+                raw_output = await read_streamed(response)
+                body = None
+            else:
+                body = await read_body(response)
+                raw_output = loads(body)
+            if cache_mode in ("on", "write_only"):
+                request_id = response.headers.get("x-oneai-request-id")
+                response_cache.update(
+                    cache_key,
+                    (body or dumps(raw_output), {"x-oneai-request-id": request_id}),
+                )
+            return build_output(steps, raw_output, response.headers)
 
 
 async def post_pipeline_async(
-    session: aiohttp.ClientSession,
+    session: "aiohttp.ClientSession",
     input: Input,
     steps: List[Skill],
     api_key: str,
     multilingual: bool,
     csv_params: CSVParams = None,
+    steps_json: bytes = None,
 ) -> str:
     validate_api_key(api_key)
 
     is_file = isinstance(input.text, io.IOBase)
     endpoint = endpoint_async_file if is_file else endpoint_async
-    request = build_request(input, steps, multilingual, not is_file, csv_params)
-    endpoint += ("?pipeline=" + urllib.parse.quote(request)) if is_file else ""
+    request = build_request(
+        input, steps, multilingual, not is_file, csv_params, steps_json
+    )
+    # ":" and "," are valid in a query string, leaving them unescaped keeps the url much shorter
+    endpoint += (
+        ("?pipeline=" + urllib.parse.quote(request, safe="/:,")) if is_file else ""
+    )
     url = f"{oneai.URL}/{endpoint}"
-    headers = {
-        "api-key": api_key,
-        "Content-Type": "application/json",
-        "User-Agent": f"python-sdk/{oneai.__version__}/{oneai.api.uuid}",
-    }
+    headers = {"api-key": api_key, "Content-Type": "application/json"}
     data = input.text if is_file else request
 
-    if oneai.DEBUG_LOG_REQUESTS:
-        oneai.logger.debug(f"POST {url}\n")
-        oneai.logger.debug(f"headers={json.dumps(headers, indent=4)}\n")
+    if oneai.DEBUG_LOG_REQUESTS and oneai.logger.isEnabledFor(logging.DEBUG):
         if is_file:
             oneai.logger.debug(
-                f"decoded pipeline={json.dumps(json.loads(request), indent=4)}\n"
+                "POST %s\nheaders=%s\ndecoded pipeline=%s\ndata=%s\n",
+                url,
+                pretty(headers),
+                pretty(request),
+                input.text,
             )
-            oneai.logger.debug(f"data={input.text}\n")
         else:
-            oneai.logger.debug(f"data={json.dumps(json.loads(request), indent=4)}\n")
+            oneai.logger.debug(
+                "POST %s\nheaders=%s\ndata=%s\n", url, pretty(headers), pretty(request)
+            )
 
+    if not is_file:
+        data = compress_request(data, headers)
     async with session.post(url, headers=headers, data=data) as response:
         if response.status not in [200, 202]:
             await handle_unsuccessful_response(response)
         else:
-            return await response.json()
+            return loads(await read_body(response))
 
 
 async def get_task_status(
-    session: aiohttp.ClientSession,
+    session: "aiohttp.ClientSession",
     task_id: str,
     api_key: str,
 ):
     validate_api_key(api_key)
 
     url = f"{oneai.URL}/{endpoint_async_tasks}/{task_id}"
-    headers = {
-        "api-key": api_key,
-        "User-Agent": f"python-sdk/{oneai.__version__}/{oneai.api.uuid}",
-    }
+    headers = {"api-key": api_key}
 
-    if oneai.DEBUG_LOG_REQUESTS:
-        oneai.logger.debug(f"GET {url}\n")
-        oneai.logger.debug(f"headers={json.dumps(headers, indent=4)}\n")
+    if oneai.DEBUG_LOG_REQUESTS and oneai.logger.isEnabledFor(logging.DEBUG):
+        oneai.logger.debug("GET %s\nheaders=%s\n", url, pretty(headers))
 
     async with session.get(url, headers=headers) as response:
         if response.status != 200:
             await handle_unsuccessful_response(response)
         else:
-            return await response.json()
+            return loads(await read_body(response))
@@ -1,10 +1,19 @@
 import asyncio
+import atexit
 import concurrent.futures
 import os
-from typing import Awaitable, TypeVar
+import queue
+import threading
+from typing import Any, Awaitable, Callable, TypeVar
 
 
-# for jupyter environment, to avoid "asyncio.run() cannot be called from a running event loop"
+# sync calls are run on a single background event loop, kept for the lifetime of the process,
+# so the shared client session (and its open connections) is reused between calls
+_loop: asyncio.AbstractEventLoop = None
+_thread: threading.Thread = None
+_lock = threading.Lock()
+
+# for sync calls made from the background loop itself (e.g. from a `run_batch` callback), which can't block it
 pool = concurrent.futures.ThreadPoolExecutor()
 
 if os.name == "nt":  # Windows
@@ -14,14 +23,105 @@ if os.name == "nt":  # Windows
 T = TypeVar("T")
 
 
-def async_to_sync(coro: Awaitable[T]) -> T:
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever, name="oneai-event-loop", daemon=True
+            )
+            _thread.start()
+        return _loop
+
+
+def _reset():
+    # the background thread doesn't survive a fork, start a new loop in the child process
+    global _loop, _thread, _lock
+    _loop, _thread, _lock = None, None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset)
+
+
+@atexit.register
+def _shutdown():
+    loop, thread = _loop, _thread
+    if loop is None or loop.is_closed():
+        return
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    if loop.is_running():
+        return
+    # cancel pending tasks, then close the client session with the loop's async generators
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    loop.run_until_complete(loop.shutdown_asyncgens())
+    loop.close()
+
+
+def async_to_sync(coro: Awaitable[T], calls: "queue.SimpleQueue" = None) -> T:
     """
     Runs an async function in a synchronous context.
+    While waiting, the calling thread runs the functions put in `calls` by the async function, see `on_calling_thread`.
     """
+    loop = _get_loop()
     try:
-        asyncio.get_running_loop()
-        return pool.submit(asyncio.run, coro).result()
+        running = asyncio.get_running_loop()
     except RuntimeError:
-        pass
+        running = None
+    if running is loop:
+        future = pool.submit(asyncio.run, coro)
+    else:
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        if calls is not None:
+            future.add_done_callback(lambda _: calls.put(None))
+            for call in iter(calls.get, None):
+                call()
+        return future.result()
+    except BaseException:  # e.g. KeyboardInterrupt, stop the call on the background loop
+        future.cancel()
+        raise
+
+
+def on_calling_thread(
+    callback: Callable[..., Any], calls: "queue.SimpleQueue"
+) -> Callable[..., Awaitable[Any]]:
+    """
+    Wraps a sync callback of an async function run by `async_to_sync(..., calls)`, so it's called on the thread
+    waiting for the async function rather than on the background event loop (e.g. for thread-bound sqlite3 connections).
+    Async callbacks (and `None`) are returned as they are.
+    """
+    if callback is None or asyncio.iscoroutinefunction(callback):
+        return callback
+
+    async def call(*args):
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def run():
+            try:
+                result = callback(*args)
+            except Exception as e:
+                loop.call_soon_threadsafe(_resolve, done, None, e)
+            else:
+                loop.call_soon_threadsafe(_resolve, done, result, None)
+
+        calls.put(run)
+        return await done
+
+    return call
+
 
-    return asyncio.run(coro)
+def _resolve(future: asyncio.Future, result: Any, exception: BaseException):
+    if future.done():  # cancelled while the callback was running
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
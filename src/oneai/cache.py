@@ -0,0 +1,65 @@
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Hashable, Optional, Tuple
+
+import oneai
+
+CacheEntry = Tuple[bytes, dict]
+
+
+class ResponseCache:
+    """
+    A bounded in-memory LRU cache for raw pipeline API responses, keyed by a hash of the request.
+    Raw response bodies are stored (rather than `Output` objects), so outputs are rebuilt on every hit.
+
+    ## Attributes
+
+    `maxsize: int, optional`
+        Max number of cached responses. If not provided, the global `oneai.CACHE_SIZE` is used.
+
+    ## Methods
+
+    `lookup(key) -> CacheEntry | None`
+        Returns the cached `(body, headers)` entry for `key`, or `None` on a miss.
+    `update(key, value)`
+        Stores an entry, evicting the least recently used ones if the cache is full.
+    `clear()`
+        Removes all entries from the cache.
+    """
+
+    def __init__(self, maxsize: int = None):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        # a thread lock rather than an asyncio one- sync calls are executed on a background
+        # thread with its own event loop
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, request: bytes) -> bytes:
+        return blake2b(url.encode("utf-8") + b"\0" + request).digest()
+
+    def lookup(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def update(self, key: Hashable, value: CacheEntry):
+        maxsize = self.maxsize if self.maxsize is not None else oneai.CACHE_SIZE
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+response_cache = ResponseCache()
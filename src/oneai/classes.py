@@ -1,10 +1,13 @@
 from datetime import datetime, timedelta
-from dateutil import parser as dateutil
 import io
+import itertools
 import os
+import re
+import sys
 from base64 import b64encode
-import validators
-from dataclasses import dataclass, field
+import codecs
+from dataclasses import dataclass, field, fields, is_dataclass
+from functools import lru_cache
 from typing import (
     Any,
     BinaryIO,
@@ -21,8 +24,30 @@ from typing_extensions import dataclass_transform, Literal
 from warnings import warn
 
 from oneai.exceptions import InputError
-
-
+from oneai.json_utils import dumps
+
+try:
+    import pybase64
+except ImportError:  # optional dependency, see `oneai[speedups]`
+    pybase64 = None
+
+
+def _add_slots(cls):
+    # equivalent of @dataclass(slots=True), which requires python 3.10+.
+    # slotted instances have no per-instance __dict__, for classes created in bulk from API responses
+    cls_dict = dict(cls.__dict__)
+    names = tuple(f.name for f in fields(cls))
+    cls_dict["__slots__"] = names
+    for name in names:
+        cls_dict.pop(name, None)  # field defaults are held by the generated __init__
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    slotted = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+
+@_add_slots
 @dataclass
 class Utterance:
     speaker: str
@@ -37,6 +62,13 @@ class Utterance:
             timestamp_to_timedelta(u.get("timestamp", None)),
         )
 
+    def asdict(self) -> dict:
+        result = {"speaker": self.speaker} if self.speaker is not None else {}
+        result["utterance"] = self.utterance
+        if self.timestamp is not None:
+            result["timestamp"] = str(self.timestamp)
+        return result
+
     def __repr__(self) -> str:
         return (
             f"\n\t{self.timestamp} {self.speaker}: {self.utterance}"
@@ -64,6 +96,62 @@ CONTENT_TYPES: Dict[str, Tuple[str, str]] = {
 }
 
 
+_revisions = itertools.count()
+
+
+def _json_default(obj):
+    # for values the JSON encoder doesn't support, e.g. Skill-valued params and utterance timestamps
+    if isinstance(obj, timedelta):
+        return str(obj)
+    if isinstance(obj, Skill):
+        return obj.api_name
+    if is_dataclass(obj):  # may be slotted, without a __dict__
+        return {
+            f.name: getattr(obj, f.name)
+            for f in fields(obj)
+            if getattr(obj, f.name) is not None
+        }
+    return {k: v for k, v in obj.__dict__.items() if v is not None}
+
+
+class SkillParams(dict):
+    """
+    A dict of Skill parameters, tracking modifications so serialized Skills can be cached.
+
+    ## Attributes
+
+    `revision: int`
+        A process-wide unique number, replaced whenever the params are modified.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.revision = next(_revisions)
+
+    def _modified(method):
+        def wrapper(self, *args, **kwargs):
+            self.revision = next(_revisions)
+            return method(self, *args, **kwargs)
+
+        return wrapper
+
+    __setitem__ = _modified(dict.__setitem__)
+    __delitem__ = _modified(dict.__delitem__)
+    clear = _modified(dict.clear)
+    pop = _modified(dict.pop)
+    popitem = _modified(dict.popitem)
+    setdefault = _modified(dict.setdefault)
+    update = _modified(dict.update)
+    if hasattr(dict, "__ior__"):  # python 3.9+
+        __ior__ = _modified(dict.__ior__)
+    del _modified
+
+    def __setstate__(self, state: dict):
+        # copied / unpickled params get a new revision, revisions are only unique within a process
+        self.__dict__.update(state)
+        self.revision = next(_revisions)
+
+
 @dataclass(frozen=True)
 class Skill:
     """
@@ -87,6 +175,11 @@ class Skill:
         The attribute name of the Skill's output labels in the Output object.
     `params: dict[str, Any]`
         The parameters of the Skill. See the documentation for each Skill for a list of available parameters.
+
+    ## Properties
+
+    `output_attr: str`
+        The attribute name of the Skill's output in the Output object- `text_attr` for Generator Skills, otherwise `labels_attr`.
     """
 
     api_name: str = ""
@@ -95,16 +188,31 @@ class Skill:
     params: Dict[str, Any] = field(default_factory=dict)
 
     def __post_init__(self):
+        if not isinstance(self.params, SkillParams):
+            object.__setattr__(self, "params", SkillParams(self.params))
         # backwards compatibility
         if self.labels_attr is None and self.text_attr is None:
             object.__setattr__(self, "labels_attr", self.api_name)
 
+    @property
+    def output_attr(self) -> str:
+        return self.text_attr or self.labels_attr or self.api_name
+
     def asdict(self) -> dict:
         return {
             "skill": self.api_name,
             "params": {k: v for k, v in self.params.items() if v is not None},
         }
 
+    def _json(self) -> bytes:
+        # serialized `asdict()`, kept until the params are modified
+        key = (self.api_name, self.params.revision)
+        cached = getattr(self, "_json_cache", None)
+        if cached is None or cached[0] != key:
+            cached = (key, dumps(self.asdict(), default=_json_default))
+            object.__setattr__(self, "_json_cache", cached)
+        return cached[1]
+
 
 @dataclass_transform()
 def skillclass(
@@ -128,6 +236,8 @@ def skillclass(
     >>> output.my_result
     "Result text, processed with MySkill"
     """
+    # compared with the skill names of labels, which are interned as well
+    api_name, text_attr, labels_attr = map(_intern, (api_name, text_attr, labels_attr))
 
     def wrap(cls):
         if not issubclass(cls, Skill):
@@ -151,18 +261,22 @@ def skillclass(
                 params = {**params, **params["params"]}
                 del params["params"]
 
+            skill_api_name = params.pop("api_name", api_name)
+            skill_text_attr = params.pop("text_attr", text_attr)
+            skill_labels_attr = params.pop("labels_attr", labels_attr)
+            # fill in defaults before the params are wrapped, rather than through SkillParams.__setitem__
+            for k, v in classVars.items():
+                if k not in params:
+                    params[k] = v
+
             Skill.__init__(
                 self,
-                api_name=params.pop("api_name", api_name),
-                text_attr=params.pop("text_attr", text_attr),
-                labels_attr=params.pop("labels_attr", labels_attr),
+                api_name=skill_api_name,
+                text_attr=skill_text_attr,
+                labels_attr=skill_labels_attr,
                 params=params,
             )
 
-            for k, v in classVars.items():
-                if k not in self.params and k is not None:
-                    self.params[k] = v
-
         def __getattr__(self, name):
             if name in Skill.__annotations__:
                 return object.__getattribute__(self, name)
@@ -174,6 +288,8 @@ def skillclass(
             return self.params.get(name, None)
 
         def __setattr__(self, name, value):
+            if name == "params" and not isinstance(value, SkillParams):
+                value = SkillParams(value)
             if name in Skill.__annotations__:
                 return object.__setattr__(self, name, value)
 
@@ -241,7 +357,8 @@ class Input(Generic[TextContent]):
         if isinstance(text, cls):
             return text
         elif isinstance(text, str):
-            if validators.url(text):
+            # urls start with a scheme ("https://"), skip the (regex heavy) url validation for any other text
+            if "://" in text[:16] and _is_url(text):
                 return cls(text, type="article", content_type="text/uri-list")
             else:
                 return cls(text, type="article", content_type="text/plain")
@@ -258,23 +375,83 @@ class Input(Generic[TextContent]):
                 )
             content_type, input_type = CONTENT_TYPES[ext]
             if ext == ".csv" and isinstance(text, io.TextIOBase):
-                text = io.BytesIO(text.read().encode("utf-8"))
+                text = _utf8_bytes(text)
             return cls(text, type=input_type, content_type=content_type)
         else:
             raise ValueError(f"invalid content type {type(text)}")
 
+    def _text_json(self) -> Union[str, List[dict]]:
+        # json-ready text. not cached, utterances may be modified in place between requests
+        text = self.text
+        if not isinstance(text, list):
+            return text
+        return [u.asdict() if isinstance(u, Utterance) else u for u in text]
+
     def _make_sync(self) -> "Input[Union[str, List[Utterance]]]":
         if isinstance(self.text, io.BufferedIOBase):
-            self.text = b64encode(self.text.read()).decode("ascii")
+            self.text = _b64encode(self.text.read())
             self.encoding = "base64"
         elif isinstance(self.text, io.TextIOBase):
             self.text = self.text.read()
         return self
 
 
+def _b64encode(data: bytes) -> str:
+    # simd encoder, builds the str without an intermediate bytes copy
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(data)
+    return b64encode(data).decode("ascii")
+
+
+def _utf8_bytes(text: io.TextIOBase) -> io.IOBase:
+    # an unread utf-8 text file is sent through its underlying binary file, without decoding and re-encoding it in memory
+    buffer = getattr(text, "buffer", None)
+    encoding = getattr(text, "encoding", None)
+    if buffer is not None and encoding and codecs.lookup(encoding).name == "utf-8":
+        try:
+            if text.tell() == 0:
+                return buffer
+        except (OSError, ValueError):  # not seekable
+            pass
+    return io.BytesIO(text.read().encode("utf-8"))
+
+
+def _is_url(text: str) -> bool:
+    # imported on first use, compiling its url pattern takes most of the SDK's import time
+    import validators
+
+    return bool(validators.url(text))
+
+
+# the `HH:MM:SS[.ffffff]` format sent by the API, parsed without dateutil
+_TIMESTAMP_PATTERN = re.compile(r"(\d{1,2}):(\d{1,2}):(\d{1,2})(?:\.(\d+))?", re.ASCII)
+
+
+@lru_cache(maxsize=4096)  # labels of the same utterance share its timestamps
+def _parse_timestamp(timestamp: str) -> Optional[timedelta]:
+    # `None` if not in the API format, or out of range
+    match = _TIMESTAMP_PATTERN.fullmatch(timestamp)
+    if match is None:
+        return None
+    hours, minutes, seconds, fraction = match.groups()
+    hours, minutes, seconds = int(hours), int(minutes), int(seconds)
+    if hours < 24 and minutes < 60 and seconds < 60:
+        return timedelta(
+            0,
+            hours * 3600 + minutes * 60 + seconds,
+            int(fraction[:6].ljust(6, "0")) if fraction else 0,
+        )
+    return None
+
+
 def timestamp_to_timedelta(timestamp: str) -> timedelta:
     if not timestamp:
         return None
+    parsed = _parse_timestamp(timestamp)
+    if parsed is not None:
+        return parsed
+    from dateutil import parser as dateutil
+
     try:
         dt = dateutil.parse(timestamp)
     except Exception as e:
@@ -285,6 +462,7 @@ def timestamp_to_timedelta(timestamp: str) -> timedelta:
     )
 
 
+@_add_slots
 @dataclass
 class Span:
     start: int
@@ -294,21 +472,16 @@ class Span:
 
     @classmethod
     def from_dict(cls, objects: List[dict], text: str) -> "List[Span]":
-        return (
-            []
-            if not objects
-            else [
-                cls(
-                    start=object.get("start", None),
-                    end=object.get("end", None),
-                    section=object.get("section", None),
-                    text=text,
-                )
-                for object in objects
-            ]
-        )
+        if not objects:
+            return []
+        # positional arguments, this runs once for every span in the output
+        return [
+            cls(object.get("start"), object.get("end"), object.get("section"), text)
+            for object in objects
+        ]
 
 
+@_add_slots
 @dataclass
 class Label:
     """
@@ -361,34 +534,56 @@ class Label:
 
     @classmethod
     def from_dict(cls, object: dict) -> "Label":
+        # read without popping, the raw dict isn't used after parsing
+        get, spans = object.get, Span.from_dict
+        span_text = get("span_text")
+        timestamp, timestamp_end = get("timestamp"), get("timestamp_end")
+        # positional arguments, in field order
         return cls(
-            type=object.pop("type", ""),
-            skill=object.pop("skill", ""),
-            name=object.pop("name", ""),
-            output_spans=Span.from_dict(
-                object.pop("output_spans", []), object.get("span_text", None)
-            ),
-            input_spans=Span.from_dict(
-                object.pop("input_spans", []), object.get("span_text", None)
-            ),
-            _span=object.pop("span", [0, 0]),
-            span_text=object.pop("span_text", ""),
-            value=object.pop("value", ""),
-            data=object.pop("data", {}),
-            timestamp=timestamp_to_timedelta(object.pop("timestamp", "")),
-            timestamp_end=timestamp_to_timedelta(object.pop("timestamp_end", "")),
+            _intern(get("type", "")),
+            _intern(get("skill", "")),
+            _intern(get("name", "")),
+            get("span", [0, 0]),
+            spans(get("output_spans"), span_text),
+            spans(get("input_spans"), span_text),
+            span_text if span_text is not None else "",
+            # most labels have no timestamps, skip the call for them
+            timestamp_to_timedelta(timestamp) if timestamp else None,
+            timestamp_to_timedelta(timestamp_end) if timestamp_end else None,
+            get("value", ""),
+            get("data", {}),
         )
 
     def __repr__(self) -> str:
-        return (
-            "oneai.Label("
-            + ", ".join(
-                f"{k}={repr(v)}"
-                for k, v in self.__dict__.items()
-                if v and not k.startswith("_")
-            )
-            + ")"
-        )
+        # non-empty public fields, in field order. unrolled, since outputs are printed with all their labels
+        parts = []
+        if self.type:
+            parts.append(f"type={self.type!r}")
+        if self.skill:
+            parts.append(f"skill={self.skill!r}")
+        if self.name:
+            parts.append(f"name={self.name!r}")
+        if self.output_spans:
+            parts.append(f"output_spans={self.output_spans!r}")
+        if self.input_spans:
+            parts.append(f"input_spans={self.input_spans!r}")
+        if self.span_text:
+            parts.append(f"span_text={self.span_text!r}")
+        if self.timestamp:
+            parts.append(f"timestamp={self.timestamp!r}")
+        if self.timestamp_end:
+            parts.append(f"timestamp_end={self.timestamp_end!r}")
+        if self.value:
+            parts.append(f"value={self.value!r}")
+        if self.data:
+            parts.append(f"data={self.data!r}")
+        return "oneai.Label(" + ", ".join(parts) + ")"
+
+
+def _intern(value: Any) -> Any:
+    # label types, skills and names repeat across the labels of an output (and match skill names),
+    # share a single copy of each
+    return sys.intern(value) if type(value) is str else value
 
 
 class Labels(List[Label]):
@@ -409,6 +604,8 @@ class Labels(List[Label]):
         A list of all span texts of the labels.
     """
 
+    __slots__ = ()
+
     @property
     def values(self) -> List[Any]:
         return [l.value for l in self]
@@ -1,6 +1,9 @@
-import json
-from typing import Dict, Union
-from aiohttp import ClientResponse
+from typing import Dict, Union, TYPE_CHECKING
+
+from oneai.json_utils import loads
+
+if TYPE_CHECKING:
+    from aiohttp import ClientResponse
 
 # todo: input type validation errors
 
@@ -55,31 +58,60 @@ class ServerError(OneAIError):
     """An error raised when the an internal server error occured."""
 
 
+class RateLimitError(ServerError):
+    """
+    An error raised when too many requests were made in a short period of time.
+    A subclass of `ServerError`, which was raised for these errors in earlier versions.
+
+    ## Attributes
+
+    `retry_after: float`
+        Number of seconds to wait before retrying, from the `Retry-After` response header. `None` if not provided.
+    """
+
+    def __init__(self, *args, retry_after: float = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+
+
 errors = {  # map http status codes to OneAIError subclasses
     400: InputError,
     401: APIKeyError,
     403: APIKeyError,
+    429: RateLimitError,
     500: ServerError,
     503: ServerError,
 }
 
 
-async def handle_unsuccessful_response(response: Union[ClientResponse, Dict]):
-    status, reason = 0, ""
-    if isinstance(response, ClientResponse):
+def parse_retry_after(value: str) -> float:
+    # only the delay-seconds form of the header is supported, not HTTP dates
+    try:
+        return max(float(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+async def handle_unsuccessful_response(response: Union["ClientResponse", Dict]):
+    status, reason, retry_after = 0, "", None
+    if isinstance(response, dict):
+        status = int(str(response.get("status_code", 0))[:3])
+    else:
+        status, reason = response.status, response.reason
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
         try:
-            status, reason = response.status, response.reason
-            response = json.loads(await response.content.read())
+            response = loads(await response.content.read())
         except:
             response = {}
-    else:
-        status = int(str(response.get("status_code", 0))[:3])
-    raise errors.get(status, ServerError)(
+    error = errors.get(status, ServerError)(
         response.get("status_code", status),
         response.get("message", reason),
         response.get("details", ""),
         response.get("request_id", ""),
     )
+    if isinstance(error, RateLimitError):
+        error.retry_after = retry_after
+    raise error
 
 
 def validate_api_key(api_key: str):
@@ -0,0 +1,51 @@
+import json
+from typing import Any, Callable, Union
+
+try:
+    import orjson
+except ImportError:  # optional dependency, see `oneai[speedups]`
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional dependency, see `oneai[speedups]`
+    ijson = None
+
+
+def dumps(obj: Any, default: Callable[[Any], Any] = None) -> bytes:
+    """
+    Serializes `obj` to UTF-8 encoded JSON bytes, using `orjson` if installed.
+    Dataclasses are passed to `default` rather than serialized natively, to match the stdlib behavior.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=default,
+            option=orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(obj, default=default, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserializes JSON `data`, using `orjson` if installed.
+    """
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class pretty:
+    """
+    Lazily formats `obj` as indented JSON for logging, only when the log record is actually emitted.
+    JSON `bytes` / `str` (e.g. an already serialized request) are parsed first.
+    """
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj: Any):
+        self.obj = obj
+
+    def __str__(self) -> str:
+        obj = loads(self.obj) if isinstance(self.obj, (bytes, str)) else self.obj
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+        return json.dumps(obj, indent=2)
@@ -8,6 +8,7 @@ from typing import (
     Union,
     TYPE_CHECKING,
     Dict,
+    NamedTuple,
 )
 
 if TYPE_CHECKING:
@@ -31,8 +32,8 @@ class Output(Input[TextContent], OutputAttrs if TYPE_CHECKING else object):
     def __init__(
         self,
         text: TextContent,
-        skills: List[Skill] = [],
-        data: List[Union[Labels, "Output"]] = [],
+        skills: List[Skill] = None,
+        data: List[Union[Labels, "Output"]] = (),
         outputs: List["Output"] = None,
         task_id: str = None,
     ):
@@ -43,27 +44,30 @@ class Output(Input[TextContent], OutputAttrs if TYPE_CHECKING else object):
         )
 
         self.task_id = task_id
-        self.skills = skills
-        for skill, value in zip(skills, data):
-            setattr(self, skill.text_attr or skill.labels_attr or skill.api_name, value)
+        # a new list for each Output, rather than a shared mutable default
+        self.skills = skills if skills is not None else []
+        for skill, value in zip(self.skills, data):
+            setattr(self, skill.output_attr, value)
 
         if outputs:
             setattr(self, "outputs", outputs)
 
     def __dir__(self) -> Iterable[str]:
-        return super().__dir__() + [
-            skill.text_attr or skill.labels_attr or skill.api_name
-            for skill in self.skills
-        ]
+        names = super().__dir__()
+        for skill in self.skills:
+            attr = skill.output_attr
+            if attr not in self.__dict__:
+                names.append(attr)
+        return names
 
     def __repr__(self) -> str:
         if self.text is None and self.task_id is not None:
             return f"oneai.Output(task_id={self.task_id})"
-        result = f"oneai.Output(text={repr(self.text)}"
+        parts = [f"oneai.Output(text={repr(self.text)}"]
         for skill in self.skills:
-            attr = skill.text_attr or skill.labels_attr or skill.api_name
-            result += f", {attr}={repr(getattr(self, attr))}"
-        return result + ")"
+            attr = skill.output_attr
+            parts.append(f"{attr}={repr(getattr(self, attr))}")
+        return ", ".join(parts) + ")"
 
     async def get_status(self, api_key: str = None) -> str:
         if self.task_id is None:
@@ -102,23 +106,35 @@ class Output(Input[TextContent], OutputAttrs if TYPE_CHECKING else object):
 class BatchResponse:
     def __init__(self):
         self._data: Dict[Input, Output] = {}
+        # first input of each (hashable) text, for O(1) lookups by text
+        self._by_text: Dict[Hashable, Input] = {}
 
     def __setitem__(self, key: Input, value: Output):
         self._data[key] = value
+        if isinstance(key.text, Hashable):
+            self._by_text.setdefault(key.text, key)
 
     def __getitem__(self, key: Input) -> Output:
-        return (
-            self._data[key]
-            if isinstance(key, Hashable) and key in self._data
-            else next(v for k, v in self._data.items() if k.text == key)
-        )
+        if isinstance(key, Hashable):
+            if key in self._data:
+                return self._data[key]
+            if key in self._by_text:
+                return self._data[self._by_text[key]]
+        return next(v for k, v in self._data.items() if k.text == key)
 
     def items(self) -> Iterable[Tuple[Input, Output]]:
         return self._data.items()
 
     def __contains__(self, key: Input) -> bool:
-        return (
-            isinstance(key, Hashable)
-            and key in self._data
-            or any(k.text == key for k in self._data)
-        )
+        if isinstance(key, Hashable):
+            return key in self._data or key in self._by_text
+        return any(k.text == key for k in self._data)
+
+
+class BatchSummary(NamedTuple):
+    """
+    Counts of processed inputs, returned by `Pipeline.run_batch` in stream mode.
+    """
+
+    successful: int
+    failed: int
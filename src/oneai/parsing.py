@@ -3,6 +3,18 @@ from typing import List
 import oneai
 from oneai.classes import Utterance
 
+# compiled once, rather than looked up in the `re` cache for every line of a conversation
+_SRT_PATTERN = re.compile(
+    r"\d+\n\d{1,2}:\d{2}:\d{2}[,.]\d{1,3} --> \d{1,2}:\d{2}:\d{2}[,.]\d{1,3}"
+)
+_NEWLINE_PATTERN = re.compile(r"\r?\n")
+_SPEAKER_PATTERN = re.compile(r"^[ A-Z_-]{3,20}$")
+_TIMED_SPEAKER_PATTERN = re.compile(r"^[ A-Za-z_-]{3,20}$")
+_PRE_TIMESTAMP_PATTERN = re.compile(r"(^\s*\[?\s*)([0-9:,\sPAM/]{4,23})(\]?)\s*")
+#                                optinal      [        timestamp                 ]  \s*
+_TIMESTAMP_PATTERN = re.compile(
+    r"(^\s*)?(\[?)(\d{1,2}:\d{1,2})(:\d{1,2})?(\.\d*)?(\]?\s*)"
+)
 
 # v 1.6.1
 def parse_conversation(text: str, strict=False) -> List[Utterance]:
@@ -23,19 +35,16 @@ def parse_conversation(text: str, strict=False) -> List[Utterance]:
     `ValueError` if `text` is not in a valid conversation format.
     """
 
-    srt_regex = re.compile(
-        r"\d+\n\d{1,2}:\d{2}:\d{2}[,.]\d{1,3} --> \d{1,2}:\d{2}:\d{2}[,.]\d{1,3}"
-    )
-    match = srt_regex.match(text)
+    match = _SRT_PATTERN.match(text)
     if match:
-        data_array = srt_regex.split(text)
+        data_array = _SRT_PATTERN.split(text)
         return [
-            Utterance(speaker="SPEAKER", utterance=line.strip().replace("\n", " "))
+            Utterance("SPEAKER", line.strip().replace("\n", " "))
             for line in data_array[1:]
         ]
 
     result = []
-    lines = re.split(r"\r?\n", text.strip())
+    lines = _NEWLINE_PATTERN.split(text.strip())
     firstLine = True
     structure = None
     currentLineInfo = None
@@ -87,14 +96,8 @@ def parse_conversation(text: str, strict=False) -> List[Utterance]:
     if previousObject and _isEmptyOrWhitespace(previousObject["text"]):
         result.pop()
 
-    return [
-        Utterance(
-            speaker=u["speaker"],
-            utterance=u["text"],
-            timestamp=u.get("timestamp", None),
-        )
-        for u in result
-    ]
+    # positional arguments, once per utterance of the conversation
+    return [Utterance(u["speaker"], u["text"], u.get("timestamp")) for u in result]
 
 
 def _isEmptyOrWhitespace(text):
@@ -135,9 +138,9 @@ def _parseSpeakerLine(text: str):
     ################################################
     # check if speaker only, in all caps - WEAK PATTERN
     match = (
-        re.search(r"^[ A-Za-z_-]{3,20}$", text)
+        _TIMED_SPEAKER_PATTERN.search(text)
         if timestampFound
-        else re.search(r"^[ A-Z_-]{3,20}$", text)
+        else _SPEAKER_PATTERN.search(text)
     )
     if match is not None:
         value["weak"] = not timestampFound
@@ -189,7 +192,7 @@ def _comp(a, b):
 
 def get_timestamp(text, value):
     # match preceding timestamp "[3:07 PM, 3/15/2022] Adam Hanft: Helps"
-    match = re.search(r"(^\s*\[?\s*)([0-9:,\sPAM/]{4,23})(\]?)\s*", text)
+    match = _PRE_TIMESTAMP_PATTERN.search(text)
     if match is not None and (match[3] or match[0].find("/") != -1):
         value["preTime"] = True
         value["weak"] = False
@@ -199,8 +202,7 @@ def get_timestamp(text, value):
         value["timestamp_full_match_string"] = match[0]
         return True
 
-    #                  optinal      [        timestamp                 ]  \s*
-    match = re.search(r"(^\s*)?(\[?)(\d{1,2}:\d{1,2})(:\d{1,2})?(\.\d*)?(\]?\s*)", text)
+    match = _TIMESTAMP_PATTERN.search(text)
     if match is not None:
         value["weak"] = False
         value["time"] = True
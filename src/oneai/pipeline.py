@@ -1,7 +1,10 @@
-from typing import Callable, Iterable, List, Union
+import asyncio
+import queue
+import weakref
+from typing import Callable, Iterable, List, Tuple, Union
 
 import oneai
-from oneai.async_utils import async_to_sync
+from oneai.async_utils import async_to_sync, on_calling_thread
 from oneai.classes import (
     PipelineInput,
     Skill,
@@ -9,8 +12,11 @@ from oneai.classes import (
     CSVParams,
     Input,
 )
-from oneai.output import Output, BatchResponse
+from oneai.api.pipeline import CacheMode, serialize_steps
+from oneai.output import Output, BatchResponse, BatchSummary
 from oneai.process_scheduler import (
+    InputCoalescer,
+    SPAN_LABEL_SKILLS,
     process_single_input,
     process_single_input_async,
     process_batch,
@@ -30,6 +36,13 @@ class Pipeline:
         An API key to be used in this pipelines `run` calls. If not provided, the global `oneai.api_key` is used.
     `multilingual: bool, optional`
         Whether the pipeline should be allowed to process multilingual input.
+    `cache_mode: "on" | "read_only" | "write_only" | "off", optional`
+        Whether to reuse responses of identical requests made by this process, see `oneai.CACHE_SIZE`. Defaults to "off".
+    `prefix_cache: bool, optional`
+        Whether to allow the API to reuse its processing of inputs sent repeatedly (e.g. a long document processed by multiple pipelines). Ignored where unsupported by the API.
+    `coalesce_inputs: bool, optional`
+        Whether `submit` joins text inputs submitted at about the same time into a single API request, see `submit`. Defaults to False.
+        **Inputs of all callers of the pipeline share requests**, so only enable this for pipelines whose Skills label spans of the input.
 
     ## Methods
 
@@ -37,6 +50,8 @@ class Pipeline:
         Runs the pipeline on the input text.
     `run_async(input, api_key=None) -> Output`
         Runs the pipeline on the input text asynchronously.
+    `submit(input) -> Output`
+        Runs the pipeline on the input text. With `coalesce_inputs`, in a single request with other inputs submitted at about the same time.
     `run_batch(batch, api_key=None) -> Dict[Input, Output]`
         Runs the pipeline on a batch of input texts.
     `run_batch_async(batch, api_key=None) -> Dict[Input, Output]`
@@ -66,11 +81,47 @@ class Pipeline:
     """
 
     def __init__(
-        self, steps: List[Skill], api_key: str = None, multilingual: bool = False
+        self,
+        steps: List[Skill],
+        api_key: str = None,
+        multilingual: bool = False,
+        cache_mode: CacheMode = "off",
+        prefix_cache: bool = False,
+        coalesce_inputs: bool = False,
     ) -> None:
-        self.steps = tuple(steps)  # todo: validate (based on input_type)
+        self._steps_version = 0
+        self._steps_json = None
+        self._steps_json_key = None
+        self.steps = steps  # todo: validate (based on input_type)
         self.api_key = api_key
         self.multilingual = multilingual
+        self.cache_mode = cache_mode
+        self.prefix_cache = prefix_cache
+        self.coalesce_inputs = coalesce_inputs
+        self._coalescers = (
+            weakref.WeakKeyDictionary()
+        )  # AbstractEventLoop -> InputCoalescer
+
+    @property
+    def steps(self) -> Tuple[Skill, ...]:
+        return self._steps
+
+    @steps.setter
+    def steps(self, steps: Iterable[Skill]):
+        self._steps = tuple(steps)
+        self._steps_version += 1
+
+    def _serialize_steps(self) -> bytes:
+        # reused by all runs of the pipeline, until its steps, their names, or their params are modified.
+        # same key as each skill's `Skill._json` cache
+        key = (
+            self._steps_version,
+            tuple((skill.api_name, skill.params.revision) for skill in self._steps),
+        )
+        if key != self._steps_json_key:
+            self._steps_json = serialize_steps(self._steps)
+            self._steps_json_key = key
+        return self._steps_json
 
     def run(
         self,
@@ -108,6 +159,9 @@ class Pipeline:
                 api_key or self.api_key or oneai.api_key,
                 multilingual or self.multilingual or oneai.multilingual,
                 csv_params=csv_params,
+                cache_mode=self.cache_mode,
+                steps_json=self._serialize_steps(),
+                prefix_cache=self.prefix_cache,
             )
         )
 
@@ -131,7 +185,7 @@ class Pipeline:
         `api_key: str, optional`
             An API key to be used in this API call. If not provided, `self.api_key` is used.
         `interval: int, optional`
-            The number of seconds to wait between polling for results.
+            The initial number of seconds to wait between polling for results. The interval grows exponentially for long running tasks, up to 30 seconds.
         `polling: bool, optional`
             Whether to poll for results. If `False`, will return an `Output` object with a `task_id`, and `None` for the rest of the fields.
 
@@ -154,8 +208,70 @@ class Pipeline:
             multilingual or self.multilingual or oneai.multilingual,
             csv_params=csv_params,
             polling=polling,
+            steps_json=self._serialize_steps(),
         )
 
+    async def submit(self, input: PipelineInput[TextContent]) -> Output[TextContent]:
+        """
+        Runs the pipeline on the input text. If `coalesce_inputs` is enabled, text inputs submitted concurrently within a few milliseconds
+        are joined into a single API request, reducing round-trips when many short inputs arrive independently
+        (e.g. from concurrent requests to a web server). Otherwise, the input is sent in its own request, like `run`.
+
+        **Coalesced inputs of independent callers share a request.** Their outputs are split back by label spans, so coalescing is
+        only supported for Skills that label spans of the input (see `oneai.process_scheduler.SPAN_LABEL_SKILLS`),
+        and a response with a label that can't be attributed to a single input is discarded, and its inputs sent again separately.
+        Only plain text articles (without metadata) are coalesced, other inputs are always sent in their own request.
+
+        ## Parameters
+
+        `input: PipelineInput`
+            The input text to be processed.
+
+        ## Returns
+
+        An Awaitable with an `Output` object containing the results of the Skills in the pipeline.
+
+        ## Raises
+
+        `ValueError` if `coalesce_inputs` is enabled and the pipeline contains Skills that don't label spans of the input.
+        `InputError` if the input is is invalid or is of an incompatible type for the pipeline.
+        `APIKeyError` if the API key is invalid, expired, or missing quota.
+        `ServerError` if an internal server error occured.
+        """
+        if not self.coalesce_inputs:
+            return await process_single_input(
+                Input.wrap(input),
+                self.steps,
+                self.api_key or oneai.api_key,
+                self.multilingual or oneai.multilingual,
+                cache_mode=self.cache_mode,
+                steps_json=self._serialize_steps(),
+                prefix_cache=self.prefix_cache,
+            )
+        unsupported = [
+            skill.api_name
+            for skill in self.steps
+            if skill.api_name not in SPAN_LABEL_SKILLS
+        ]
+        if unsupported:
+            raise ValueError(
+                f"coalesce_inputs is only supported for Skills that label spans of the input, not {unsupported}"
+            )
+        steps_json = self._serialize_steps()
+        api_key = self.api_key or oneai.api_key
+        multilingual = self.multilingual or oneai.multilingual
+        loop = asyncio.get_running_loop()
+        coalescer = self._coalescers.get(loop)
+        if coalescer is None or (
+            coalescer.steps_json is not steps_json
+            or coalescer.api_key != api_key
+            or coalescer.multilingual != multilingual
+        ):  # pipeline was modified, pending inputs are still sent by the previous coalescer
+            coalescer = self._coalescers[loop] = InputCoalescer(
+                self.steps, api_key, multilingual, steps_json=steps_json
+            )
+        return await coalescer.submit(Input.wrap(input))
+
     async def await_completion(
         self,
         task: Union[str, Output],
@@ -181,7 +297,10 @@ class Pipeline:
         ] = None,
         on_error: Callable[[PipelineInput[TextContent], Exception], None] = None,
         multilingual: bool = False,
-    ) -> BatchResponse:
+        *,
+        marshal_rows: int = 1,
+        stream: bool = False,
+    ) -> Union[BatchResponse, BatchSummary]:
         """
         Runs the pipeline on a batch of input texts.
 
@@ -192,9 +311,18 @@ class Pipeline:
         `api_key: str, optional`
             An API key to be used in this API call. If not provided, `self.api_key` is used.
         `on_output: Callable[[Input, Output], None]`
-            Action to perform on successful output, by default creates a dict mapping inputs to outputs
+            Action to perform on successful output, by default creates a dict mapping inputs to outputs.
+            Called on the thread that called `run_batch`, one output at a time.
         `on_error: Callable[[Input, Exception], None]`
-            Action to perform on error, by default creates a dict mapping inputs to errors
+            Action to perform on error, by default creates a dict mapping inputs to errors. Called on the thread that called `run_batch`.
+        `marshal_rows: int, optional`
+            Number of text inputs to join into a single API request, reducing round-trips for many short inputs.
+            Only supported for pipelines without generator Skills. Labels are split back to their inputs by their spans,
+            labels without spans are added to all inputs of the request. Only plain text articles without metadata are joined,
+            other inputs (and all inputs of pipelines with a clustering Skill) are sent separately. Defaults to 1 (a request per input).
+        `stream: bool, optional`
+            Stream outputs to `on_output`/`on_error` without keeping them in memory, for very large batches.
+            Returns a `BatchSummary` with the counts of processed inputs.
 
         ## Returns
 
@@ -206,8 +334,19 @@ class Pipeline:
         `APIKeyError` if the API key is invalid, expired, or missing quota.
         `ServerError` if an internal server error occured.
         """
+        # requests run on a background event loop, sync callbacks are called back on this thread
+        calls = queue.SimpleQueue()
         return async_to_sync(
-            self.run_batch_async(batch, api_key, on_output, on_error, multilingual)
+            self.run_batch_async(
+                batch,
+                api_key,
+                on_calling_thread(on_output, calls),
+                on_calling_thread(on_error, calls),
+                multilingual,
+                marshal_rows=marshal_rows,
+                stream=stream,
+            ),
+            calls,
         )
 
     async def run_batch_async(
@@ -219,7 +358,10 @@ class Pipeline:
         ] = None,
         on_error: Callable[[PipelineInput[TextContent], Exception], None] = None,
         multilingual: bool = False,
-    ) -> BatchResponse:
+        *,
+        marshal_rows: int = 1,
+        stream: bool = False,
+    ) -> Union[BatchResponse, BatchSummary]:
         """
         Runs the pipeline on a batch of input texts asynchronously.
 
@@ -233,6 +375,14 @@ class Pipeline:
             Action to perform on successful output, by default creates a dict mapping inputs to outputs
         `on_error: Callable[[Input, Exception], None]`
             Action to perform on error, by default creates a dict mapping inputs to errors
+        `marshal_rows: int, optional`
+            Number of text inputs to join into a single API request, reducing round-trips for many short inputs.
+            Only supported for pipelines without generator Skills. Labels are split back to their inputs by their spans,
+            labels without spans are added to all inputs of the request. Only plain text articles without metadata are joined,
+            other inputs (and all inputs of pipelines with a clustering Skill) are sent separately. Defaults to 1 (a request per input).
+        `stream: bool, optional`
+            Stream outputs to `on_output`/`on_error` without keeping them in memory, for very large batches.
+            Sync callbacks are called on a worker thread, off the event loop. Returns a `BatchSummary` with the counts of processed inputs.
 
         ## Returns
 
@@ -244,16 +394,23 @@ class Pipeline:
         `APIKeyError` if the API key is invalid, expired, or missing quota.
         `ServerError` if an internal server error occured.
         """
-        outputs = BatchResponse()
-        await process_batch(
+        # in stream mode, outputs are not collected by default
+        outputs = BatchResponse() if not stream else None
+        default_callback = outputs.__setitem__ if not stream else lambda *_: None
+        summary = await process_batch(
             (Input.wrap(i) for i in batch),
             self.steps,
-            on_output if on_output else outputs.__setitem__,
-            on_error if on_error else outputs.__setitem__,
+            on_output if on_output else default_callback,
+            on_error if on_error else default_callback,
             api_key=api_key or self.api_key or oneai.api_key,
             multilingual=multilingual or self.multilingual or oneai.multilingual,
+            cache_mode=self.cache_mode,
+            marshal_rows=marshal_rows,
+            stream=stream,
+            steps_json=self._serialize_steps(),
+            prefix_cache=self.prefix_cache,
         )
-        return outputs
+        return summary if stream else outputs
 
     def __repr__(self) -> str:
         return f"oneai.Pipeline({self.steps})"
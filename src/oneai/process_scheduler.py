@@ -1,43 +1,89 @@
 import asyncio
-from datetime import datetime, timedelta
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 import io
 import logging
+import random
+import time
+import weakref
 from typing import Awaitable, Callable, Iterable, List, Tuple, TYPE_CHECKING
 
-import aiohttp
-
 import oneai
 from oneai.api.output import build_output
-from oneai.api.pipeline import post_pipeline, post_pipeline_async, get_task_status
-from oneai.classes import Input, PipelineInput, Skill, CSVParams
-from oneai.exceptions import ServerError, handle_unsuccessful_response, OneAIError
-from oneai.output import Output
+from oneai.api.pipeline import (
+    CacheMode,
+    get_session,
+    post_pipeline,
+    post_pipeline_async,
+    get_task_status,
+    serialize_steps,
+)
+from oneai.classes import Input, PipelineInput, Skill, CSVParams, Labels, Span
+from oneai.exceptions import (
+    ServerError,
+    handle_unsuccessful_response,
+    OneAIError,
+    RateLimitError,
+)
+from oneai.output import Output, BatchSummary
+
+if TYPE_CHECKING:
+    import aiohttp
 
 logger = logging.getLogger("oneai")
 
 
-def time_format(time: timedelta):
-    minutes = f"{time.seconds // 60}m " if time.seconds > 59 else ""
-    return minutes + f"{time.seconds % 60}s {time.microseconds // 1000}ms"
+def time_format(seconds: float):
+    minutes = f"{int(seconds // 60)}m " if seconds >= 60 else ""
+    return minutes + f"{int(seconds % 60)}s {int(seconds % 1 * 1000)}ms"
 
 
 STATUS_COMPLETED = "COMPLETED"
 STATUS_FAILED = "FAILED"
 
+POLL_BACKOFF = 1.5  # polling interval growth factor, for long running tasks
+MAX_POLL_INTERVAL = 30  # seconds
+
+RATE_LIMIT_RETRIES = 3  # retries of a batch request rejected by the API rate limit
+MARSHAL_SEPARATOR = "\n\n"  # joins text inputs marshaled into a single request
+# Skills whose labels mark spans of the input, so their labels can be split back to the submitted inputs
+SPAN_LABEL_SKILLS = frozenset(
+    (
+        "emotions",
+        "keywords",
+        "highlights",
+        "sentiments",
+        "action-items",
+        "names",
+        "numbers",
+        "sentences",
+    )
+)
+
 
-# open a client session and send a request
+# send a request over the shared client session
 async def process_single_input(
     input: PipelineInput,
     steps: List[Skill],
     api_key: str,
     multilingual: bool = False,
     csv_params: CSVParams = None,
+    cache_mode: CacheMode = "off",
+    steps_json: bytes = None,
+    prefix_cache: bool = False,
 ) -> Output:
-    timeout = aiohttp.ClientTimeout(total=6000)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        return await _run_internal(
-            session, input, steps, api_key, multilingual, csv_params
-        )
+    return await _run_internal(
+        get_session(),
+        input,
+        steps,
+        api_key,
+        multilingual,
+        csv_params,
+        cache_mode,
+        steps_json,
+        prefix_cache,
+    )
 
 
 async def process_single_input_async(
@@ -48,65 +94,156 @@ async def process_single_input_async(
     multilingual: bool = False,
     csv_params: CSVParams = None,
     polling: bool = True,
+    steps_json: bytes = None,
 ) -> Output:
     if isinstance(input.text, io.TextIOBase):
         input._make_sync()
-    timeout = aiohttp.ClientTimeout(total=6000)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        name = f" '{input.text.name}'" if hasattr(input.text, "name") else ""
-        logger.debug(f"Uploading input{name}...")
-        task_id = (
-            await post_pipeline_async(
-                session, input, steps, api_key, multilingual, csv_params
+    session = get_session()
+    name = f" '{input.text.name}'" if hasattr(input.text, "name") else ""
+    logger.debug(f"Uploading input{name}...")
+    task_id = (
+        await post_pipeline_async(
+            session, input, steps, api_key, multilingual, csv_params, steps_json
+        )
+    )["task_id"]
+    logger.debug(f"Upload of input{name} complete\n")
+    return (
+        await task_polling(task_id, session, api_key, steps, interval)
+        if polling
+        else Output(None, steps, task_id=task_id)
+    )
+
+
+@dataclass
+class _MonitoredTask:
+    task_id: str
+    session: "aiohttp.ClientSession"
+    api_key: str
+    steps: List[Skill]
+    interval: float
+    future: asyncio.Future
+    start: float = field(default_factory=time.monotonic)
+    next_poll: float = 0
+    polls: int = 0
+
+
+class TaskMonitor:
+    """
+    Polls the status of async pipeline tasks from a single background task (one monitor per event loop),
+    so many monitored tasks share wakeups instead of each polling on its own schedule.
+    Polls that are due at about the same time are sent together.
+    """
+
+    def __init__(self):
+        self._tasks: List[_MonitoredTask] = []
+        self._poller: asyncio.Task = None
+        self._wakeup = asyncio.Event()
+
+    def register(
+        self,
+        task_id: str,
+        session: "aiohttp.ClientSession",
+        api_key: str,
+        steps: List[Skill],
+        interval: float,
+    ) -> "asyncio.Future[Output]":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._tasks.append(
+            _MonitoredTask(task_id, session, api_key, steps, interval, future)
+        )
+        if self._poller is None or self._poller.done():
+            self._poller = loop.create_task(self._run())
+        else:
+            self._wakeup.set()
+        return future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._tasks:
+                now = loop.time()
+                # coalesce polls due within a fraction of their interval
+                due = [t for t in self._tasks if t.next_poll <= now + t.interval * 0.1]
+                if due:
+                    await asyncio.gather(*(self._poll(t) for t in due))
+                if not self._tasks:
+                    break
+                delay = min(t.next_poll for t in self._tasks) - loop.time()
+                self._wakeup.clear()
+                try:  # sleep until the next poll is due, or a new task is registered
+                    await asyncio.wait_for(self._wakeup.wait(), max(delay, 0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # the monitor references its loop (through the poller), so the entry is removed explicitly.
+            # the next task polled on this loop starts a new monitor
+            if _monitors.get(loop) is self:
+                del _monitors[loop]
+
+    async def _poll(self, task: _MonitoredTask):
+        if task.future.done():  # cancelled by the caller
+            self._tasks.remove(task)
+            return
+        try:
+            status, response = await process_task_status(
+                task.task_id, task.session, task.api_key, task.steps
             )
-        )["task_id"]
-        logger.debug(f"Upload of input{name} complete\n")
-        return (
-            await task_polling(task_id, session, api_key, steps, interval)
-            if polling
-            else Output(None, steps, task_id=task_id)
+        except Exception as e:
+            status, response = STATUS_FAILED, e
+        logger.debug(
+            f"Processing input - status {status} - {time_format(time.monotonic() - task.start)}"
+        )
+        if status in (STATUS_COMPLETED, STATUS_FAILED):
+            self._tasks.remove(task)
+            if not task.future.done():
+                if status == STATUS_COMPLETED:
+                    task.future.set_result(response)
+                else:
+                    task.future.set_exception(response)
+            return
+        delay = min(
+            task.interval * POLL_BACKOFF**task.polls,
+            max(task.interval, MAX_POLL_INTERVAL),
         )
+        # jitter, to avoid synchronized wakeups of tasks started together
+        task.next_poll = asyncio.get_running_loop().time() + delay * (
+            1 + random.random() * 0.1
+        )
+        task.polls += 1
+
+
+_monitors = weakref.WeakKeyDictionary()  # AbstractEventLoop -> TaskMonitor
 
 
 async def task_polling(
     task_id: str,
-    session: aiohttp.ClientSession,
+    session: "aiohttp.ClientSession",
     api_key: str,
     steps: List[Skill],
     interval: int,
 ) -> Output:
-    timeout = aiohttp.ClientTimeout(total=6000)
-    close = session is None
-    if session == None:
-        session = aiohttp.ClientSession(timeout=timeout)
-    status, response = "", None
-    start = datetime.now()
-    while status != STATUS_COMPLETED:
-        status, response = await process_task_status(task_id, session, api_key, steps)
-        if status == STATUS_FAILED:
-            raise response
-        logger.debug(
-            f"Processing input - status {status} - {time_format(datetime.now() - start)}"
-        )
-        await asyncio.sleep(interval)
+    loop = asyncio.get_running_loop()
+    monitor = _monitors.get(loop)
+    if monitor is None:
+        monitor = _monitors[loop] = TaskMonitor()
+    start = time.monotonic()
+    response = await monitor.register(
+        task_id, session or get_session(), api_key, steps, interval
+    )
     logger.debug(
-        f"Processing of input complete - {time_format(datetime.now() - start)} total\n"
+        f"Processing of input complete - {time_format(time.monotonic() - start)} total\n"
     )
-    if close:
-        await session.close()
     return response
 
 
 async def process_task_status(
     task_id: str,
-    session: aiohttp.ClientSession,
+    session: "aiohttp.ClientSession",
     api_key: str,
     steps: List[Skill],
 ) -> Tuple[str, Output]:
-    timeout = aiohttp.ClientTimeout(total=6000)
-    close = session is None
-    if session == None:
-        session = aiohttp.ClientSession(timeout=timeout)
+    session = session or get_session()
     response = await get_task_status(session, task_id, api_key)
     status = response["status"]
     if status == STATUS_FAILED:
@@ -118,12 +255,146 @@ async def process_task_status(
         return status, build_output(
             steps, response["result"], {"x-oneai-request-id": task_id}
         )
-    if close:
-        await session.close()
     return status, None
 
 
-# open a client session with multiple workers and send concurrent requests
+class TokenBucket:
+    """
+    Limits the rate of batch requests, allowing short bursts of up to `capacity` requests.
+    Requests wait in order of arrival. Unlimited if `rate` is `None`, but still paused on rate limit errors.
+    """
+
+    def __init__(self, rate: float = None, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate or 0, 1)
+        self._tokens = self.capacity
+        self._updated: float = None
+        self._paused_until = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while True:
+                now = loop.time()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self.rate is None:
+                    return
+                if self._updated is not None:
+                    self._tokens = min(
+                        self.capacity, self._tokens + (now - self._updated) * self.rate
+                    )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        # stop all requests, e.g. after the API responded with a Retry-After header
+        until = asyncio.get_running_loop().time() + seconds
+        self._paused_until = max(self._paused_until, until)
+
+
+class InputCoalescer:
+    """
+    Joins text inputs submitted at about the same time (e.g. by concurrent requests to a web server)
+    into a single marshaled request, sending up to `max_batch` inputs per request.
+    A request is sent `max_wait` seconds after the first input was submitted, or once `max_batch` inputs are queued.
+
+    Inputs of independent callers share a request, so only labels that can be attributed to a single input by their span
+    are split back to the outputs. Steps must be in `SPAN_LABEL_SKILLS`, and if the response still contains a label without a span,
+    the inputs of the request are sent again separately rather than sharing it.
+    """
+
+    def __init__(
+        self,
+        steps: List[Skill],
+        api_key: str,
+        multilingual: bool = False,
+        max_batch: int = 32,
+        max_wait: float = 0.01,
+        steps_json: bytes = None,
+    ):
+        self.steps = steps
+        self.api_key = api_key
+        self.multilingual = multilingual
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.steps_json = steps_json
+        self._pending: List[Tuple[Input, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle = None
+        self._tasks = set()
+
+    async def submit(self, input: Input) -> Output:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not _can_marshal(input):
+            self._send([(input, future)])
+            return await future
+        self._pending.append((input, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch: List[Tuple[Input, asyncio.Future]]):
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)  # keep a reference until done
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Input, asyncio.Future]]):
+        if len(batch) == 1:
+            return await self._run_single(*batch[0])
+        inputs = [input for input, _ in batch]
+        try:
+            output = await self._request(_marshal(inputs))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        if not _attributable(output):
+            # a label that can't be split by its span would be shared by all callers
+            await asyncio.gather(*(self._run_single(*item) for item in batch))
+            return
+        for (_, future), output in zip(batch, _demarshal(output, inputs)):
+            if not future.done():
+                future.set_result(output)
+
+    async def _run_single(self, input: Input, future: asyncio.Future):
+        try:
+            output = await self._request(input)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(output)
+
+    def _request(self, input: Input) -> Awaitable[Output]:
+        return _run_internal(
+            get_session(),
+            input,
+            self.steps,
+            self.api_key,
+            self.multilingual,
+            steps_json=self.steps_json,
+        )
+
+
+# send concurrent requests over the shared client session
 async def process_batch(
     batch: Iterable[PipelineInput],
     steps: List[Skill],
@@ -131,28 +402,31 @@ async def process_batch(
     on_error: Callable[[PipelineInput, Exception], None],
     api_key: str,
     multilingual: bool = False,
-):
-    iterator = iter(batch)
+    cache_mode: CacheMode = "off",
+    marshal_rows: int = 1,
+    stream: bool = False,
+    steps_json: bytes = None,
+    prefix_cache: bool = False,
+) -> BatchSummary:
+    if marshal_rows > 1 and any(skill.text_attr for skill in steps):
+        raise ValueError("marshal_rows is only supported without generator Skills")
+
     successful = 0  # total successful responses
     failed = 0  # number of exceptions occurred
-    time_total = timedelta()  # total time spent on all requests
+    time_total = 0.0  # total seconds spent on all requests
     # length = len(batch) if hasattr(batch, "__len__") else 0
 
-    def next_input():  # distribute batch to workers
-        try:
-            return next(iterator)
-        except StopIteration:
-            return None  # we need to break loop for each worker, so we ignore StopIteration
-
     def log_progress(
-        time_delta=timedelta(), start=False, end=False
+        time_delta=0.0, start=False, end=False
     ):  # todo progress bar for iterables with __len__
         nonlocal successful, failed, time_total
 
         time_total += time_delta
+        if not logger.isEnabledFor(logging.DEBUG):
+            return  # skip formatting progress messages that won't be logged
         if start:
             logger.debug(
-                f"Starting batch processing with {oneai.MAX_CONCURRENT_REQUESTS} workers"
+                f"Starting batch processing with {oneai.MAX_CONCURRENT_REQUESTS} concurrent requests"
             )
         elif end:
             logger.debug(
@@ -161,7 +435,7 @@ async def process_batch(
                     successful + failed,
                     time_format(
                         time_total
-                        / (successful + failed)
+                        / max(successful + failed, 1)
                         / oneai.MAX_CONCURRENT_REQUESTS
                     ),
                     time_format(time_total / oneai.MAX_CONCURRENT_REQUESTS),
@@ -181,41 +455,195 @@ async def process_batch(
                 )
             )
 
-    async def req_worker(session):  # run requests sequentially
-        nonlocal successful, failed
+    # in stream mode, sync callbacks run on a single worker thread (so they're still called one at a time)
+    # to keep slow callbacks (e.g. file writes) from blocking requests on the event loop
+    executor = ThreadPoolExecutor(max_workers=1) if stream else None
+
+    def as_async(callback):  # check once whether a callback is async, not on every call
+        if asyncio.iscoroutinefunction(callback):
+            return callback
+        if executor is not None:
+            return lambda *args: asyncio.get_running_loop().run_in_executor(
+                executor, callback, *args
+            )
+
+        async def call(*args):
+            callback(*args)
+
+        return call
+
+    on_output, on_error = as_async(on_output), as_async(on_error)
+
+    # clustering steps insert their input into a collection, a marshaled input would be inserted as a single item
+    marshal = marshal_rows > 1 and not any(
+        skill.api_name == "clustering" for skill in steps
+    )
+
+    def chunk_inputs():  # group text inputs to be marshaled into a single request
+        chunk = []
+        for input in batch:
+            if marshal and _can_marshal(input):
+                chunk.append(input)
+                if len(chunk) == marshal_rows:
+                    yield chunk
+                    chunk = []
+            else:
+                yield [input]
+        if chunk:
+            yield chunk
 
-        time_start = datetime.now()
-        input = next_input()
-        while input:
+    async def send(session, input):  # wait for the rate limit, retry if rejected by it
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            await bucket.acquire()
             try:
-                output = await _run_internal(
-                    session, input, steps, api_key, multilingual
+                return await _run_internal(
+                    session,
+                    input,
+                    steps,
+                    api_key,
+                    multilingual,
+                    cache_mode=cache_mode,
+                    steps_json=steps_json,
+                    prefix_cache=prefix_cache,
                 )
-                on_output(input, output)
-                successful += 1
+            except RateLimitError as e:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                delay = e.retry_after if e.retry_after is not None else 2**attempt
+                logger.debug(f"Rate limited, retrying in {delay}s")
+                bucket.pause(delay)
+
+    async def run_inputs(session, inputs):  # run a single request, then free its slot
+        nonlocal successful, failed
+
+        time_start = time.monotonic()
+        try:
+            try:
+                if len(inputs) == 1:
+                    outputs = [await send(session, inputs[0])]
+                else:
+                    output = await send(session, _marshal(inputs))
+                    outputs = _demarshal(output, inputs)
+                errors = [None] * len(inputs)
             except Exception as e:  # todo: break loop for some error types
-                logger.error(f"Input {successful + failed}: {repr(e)}")
-                on_error(input, e)
+                outputs, errors = [None] * len(inputs), [e] * len(inputs)
+            # each input is reported once, an error raised by `on_output` is reported for its own input only
+            for input, output, error in zip(inputs, outputs, errors):
+                if error is None:
+                    try:
+                        await on_output(input, output)
+                        successful += 1
+                        continue
+                    except Exception as e:
+                        error = e
+                logger.error(f"Input {successful + failed}: {repr(error)}")
+                await on_error(input, error)
                 failed += 1
+        finally:
+            semaphore.release()
+        log_progress(time.monotonic() - time_start)
+
+    # steps are the same for all inputs, so serialize them once
+    if steps_json is None:
+        steps_json = serialize_steps(steps)
+    # the semaphore caps in-flight requests, a new one is started as soon as any request completes.
+    # inputs are pulled from the batch only when a slot is free, so iterables are consumed lazily
+    semaphore = asyncio.Semaphore(oneai.MAX_CONCURRENT_REQUESTS)
+    # the bucket caps the rate of requests, independently of their concurrency
+    bucket = TokenBucket(oneai.MAX_REQUESTS_PER_SECOND)
+    tasks = set()
+    session = get_session()
+    log_progress(start=True)
+    try:
+        for inputs in chunk_inputs():
+            await semaphore.acquire()
+            task = asyncio.create_task(run_inputs(session, inputs))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        await asyncio.gather(*tasks)
+        if executor is not None:
+            executor.shutdown(wait=False)
+    log_progress(end=True)
+    return BatchSummary(successful, failed)
+
+
+def _can_marshal(input: Input) -> bool:
+    # plain text articles only- other input types, and inputs with their own metadata, are sent as they are
+    return (
+        isinstance(input.text, str)
+        and input.type == "article"
+        and input.content_type == "text/plain"
+        and input.encoding is None
+        and not input.metadata
+        and input.datetime is None
+        and input.text_index is None
+    )
+
 
-            time_end = datetime.now()
-            log_progress(time_end - time_start)
-            time_start = time_end
-            input = next_input()
+def _marshal(inputs: List[Input]) -> Input:
+    # join text inputs into a single input, see `_demarshal`
+    text = MARSHAL_SEPARATOR.join(input.text for input in inputs)
+    return Input(text, type="article", content_type="text/plain")
+
+
+def _attributable(output: Output) -> bool:
+    # whether all labels of a marshaled output can be split to their inputs by span
+    return all(
+        label.output_spans and label.output_spans[0].start is not None
+        for skill in output.skills
+        for label in getattr(output, skill.output_attr)
+    )
+
+
+def _demarshal(output: Output, inputs: List[Input]) -> List[Output]:
+    # split the output of marshaled inputs into an output per input, by label span offsets
+    offsets, offset = [], 0
+    for input in inputs:
+        offsets.append(offset)
+        offset += len(input.text) + len(MARSHAL_SEPARATOR)
+
+    def shift(spans: List[Span], offset: int) -> List[Span]:
+        return [
+            replace(span, start=span.start - offset, end=span.end - offset)
+            if span.start is not None and span.end is not None
+            else span
+            for span in spans
+        ]
+
+    data = [[Labels() for _ in output.skills] for _ in inputs]
+    for i, skill in enumerate(output.skills):
+        attr = skill.output_attr
+        for label in getattr(output, attr):
+            if not label.output_spans or label.output_spans[0].start is None:
+                # can't be attributed to a single input, add to all inputs
+                for labels in data:
+                    labels[i].append(label)
+                continue
+            row = max(bisect_right(offsets, label.output_spans[0].start) - 1, 0)
+            offset = offsets[row]
+            data[row][i].append(
+                replace(
+                    label,
+                    output_spans=shift(label.output_spans, offset),
+                    input_spans=shift(label.input_spans, offset),
+                    _span=[label._span[0] - offset, label._span[1] - offset]
+                    if label._span[0] >= offset
+                    else label._span,
+                )
+            )
+    return [
+        Output(input.text, list(output.skills), labels, task_id=output.task_id)
+        for input, labels in zip(inputs, data)
+    ]
 
-    workers = []
-    timeout = aiohttp.ClientTimeout(total=6000)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        for _ in range(oneai.MAX_CONCURRENT_REQUESTS):
-            worker = asyncio.create_task(req_worker(session))
-            workers.append(worker)
-        log_progress(start=True)
-        await asyncio.gather(*workers)
-        log_progress(end=True)
 
+async def fetch_url(session: "aiohttp.ClientSession", url: str):
+    # not an API request, use the default client User-Agent rather than the SDK's
+    from aiohttp.http import SERVER_SOFTWARE
 
-async def fetch_url(session: aiohttp.ClientSession, url: str):
-    async with session.get(url) as response:
+    headers = {"User-Agent": SERVER_SOFTWARE}
+    async with session.get(url, headers=headers) as response:
         if response.status != 200:
             raise ServerError(
                 50001,
@@ -226,12 +654,15 @@ async def fetch_url(session: aiohttp.ClientSession, url: str):
 
 
 async def _run_internal(
-    session: aiohttp.ClientSession,
+    session: "aiohttp.ClientSession",
     input: Input,
     skills: List[Skill],
     api_key: str,
     multilingual: bool,
     csv_params: CSVParams = None,
+    cache_mode: CacheMode = "off",
+    steps_json: bytes = None,
+    prefix_cache: bool = False,
 ) -> Output:
     if not skills:  # no skills
         return Output(input.text)
@@ -246,5 +677,13 @@ async def _run_internal(
 
     input._make_sync()  # make input compatible with sync API
     return await post_pipeline(
-        session, input, skills, api_key, multilingual, csv_params
+        session,
+        input,
+        skills,
+        api_key,
+        multilingual,
+        csv_params,
+        cache_mode,
+        steps_json,
+        prefix_cache,
     )
@@ -596,6 +596,7 @@ class Clustering(Skill):
     """Use the output of a Skill as input for clustering, omit to use the input directly"""
 
     def __post_init__(self):
+        super().__post_init__()
         if self.collection:
             object.__setattr__(self, "labels_attr", "status")
         else:
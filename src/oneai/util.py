@@ -1,5 +1,5 @@
-import asyncio
 import oneai
+from oneai.async_utils import async_to_sync
 from typing import List, Optional, Union, Dict, Any
 from typing_extensions import Literal
 from dataclasses import dataclass
@@ -35,7 +35,7 @@ def generate_chapters(
     params: Dict[str, Any] = None,
 ) -> List[Chapter]:
     split_by_topic = oneai.skills.SplitByTopic(amount=amount, params=params)
-    output = asyncio.run(
+    output = async_to_sync(
         oneai.Pipeline([split_by_topic]).run_async(input)
         if not preprocessing
         else oneai.Pipeline([preprocessing, split_by_topic]).run_async(input)
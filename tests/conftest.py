@@ -0,0 +1,12 @@
+import pytest
+
+import oneai.process_scheduler as scheduler
+from tests.util import FakeAPI
+
+
+@pytest.fixture
+def api(monkeypatch) -> FakeAPI:
+    # pipeline requests are answered by a fake API, without the network
+    api = FakeAPI()
+    monkeypatch.setattr(scheduler, "_run_internal", api.run_internal)
+    return api
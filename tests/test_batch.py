@@ -0,0 +1,88 @@
+import asyncio
+import json
+import sqlite3
+import threading
+
+import oneai
+from oneai.classes import Input
+from oneai.output import BatchResponse
+from tests.util import process_batch, word_output
+
+
+def fail_output(input, skills):
+    if input.text == "fail":
+        raise oneai.exceptions.ServerError(50000, "failed")
+    return word_output(input, skills)
+
+
+def test_run_batch_callbacks_on_calling_thread(api):
+    api.respond = fail_output
+    # sqlite3 connections can only be used by the thread that created them
+    db = sqlite3.connect(":memory:")
+    db.execute("create table outputs (text, keywords)")
+    threads = set()
+
+    def on_output(input, output):
+        threads.add(threading.get_ident())
+        db.execute(
+            "insert into outputs values (?, ?)",
+            (input.text, ",".join(output.keywords.names)),
+        )
+
+    def on_error(input, error):
+        threads.add(threading.get_ident())
+        db.execute("insert into outputs values (?, null)", (input.text,))
+
+    pipeline = oneai.Pipeline([oneai.skills.Keywords()])
+    for stream in (False, True):
+        db.execute("delete from outputs")
+        pipeline.run_batch(
+            ["one two", "fail", "three"],
+            on_output=on_output,
+            on_error=on_error,
+            stream=stream,
+        )
+        assert sorted(db.execute("select * from outputs")) == [
+            ("fail", None),
+            ("one two", "one,two"),
+            ("three", "three"),
+        ]
+    assert threads == {threading.get_ident()}
+
+
+def test_batch_response_lookup():
+    first, duplicate = Input.wrap("one"), Input.wrap("one")
+    conversation = Input.wrap([oneai.Utterance("speaker", "two")])
+    response = BatchResponse()
+    for input in (first, duplicate, conversation):
+        response[input] = oneai.Output(input.text)
+
+    assert response[first] is not response[duplicate]
+    assert response["one"] is response[first]  # first input of the text
+    assert response[conversation.text] is response[conversation]
+    assert "one" in response and first in response
+    assert conversation.text in response
+    assert "three" not in response and Input.wrap("one") not in response
+    assert len(response.items()) == 3
+
+
+def test_batch_steps_json_default(api):
+    skill = oneai.skills.CollectionInsert(
+        collection="c", input_skill=oneai.skills.Sentiments()
+    )
+    process_batch([Input.wrap("one")], [skill])
+    steps = json.loads(api.requests[0].kwargs["steps_json"])
+    assert steps[0]["params"]["input_skill"] == "sentiments"
+
+
+def test_sync_calls_in_running_loop(api):
+    pipeline = oneai.Pipeline([oneai.skills.Keywords()])
+
+    async def cell():  # e.g. a Jupyter cell, run by the notebook's event loop
+        return pipeline.run("one two"), pipeline.run_batch(["three"])
+
+    output, outputs = asyncio.run(cell())
+    assert output.keywords.names == ["one", "two"]
+    assert outputs["three"].keywords.names == ["three"]
+    threads = {request.thread for request in api.requests}
+    assert threads == {"oneai-event-loop"}  # not the calling thread
@@ -0,0 +1,116 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer, unused_port
+
+import oneai
+from oneai.api.pipeline import endpoint_default, post_pipeline
+from oneai.cache import ResponseCache, response_cache
+from oneai.classes import Input
+
+
+def test_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    cache.update("a", (b"1", {}))
+    cache.update("b", (b"2", {}))
+    assert cache.lookup("a") == (b"1", {})  # "a" is now most recently used
+    cache.update("c", (b"3", {}))
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None and cache.lookup("c") is not None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_cache_key():
+    key = ResponseCache.key("url", b"{}")
+    assert key == ResponseCache.key("url", b"{}")
+    assert key != ResponseCache.key("url", b"{ }")
+
+
+async def pipeline(request):
+    # a local pipeline API, responds with the input text and no labels (400 for "FAIL")
+    text = (await request.json())["input"]
+    request.app["posts"].append(text)
+    if text == "FAIL":
+        return web.json_response({"status_code": 40001, "message": ""}, status=400)
+    contents = [{"utterance": text}]
+    return web.json_response(
+        {"input": contents, "output": [{"contents": contents, "labels": []}]},
+        headers={"x-oneai-request-id": "request-id"},
+    )
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    # the url is part of the cache key, so all runs of a test use the same port
+    monkeypatch.setattr(oneai, "URL", f"http://127.0.0.1:{unused_port()}")
+    response_cache.clear()
+    yield []
+    response_cache.clear()
+
+
+def run(posts, texts, cache_mode):
+    async def run_all():
+        app = web.Application()
+        app["posts"] = posts
+        app.router.add_post(f"/{endpoint_default}", pipeline)
+        async with TestServer(app, port=int(oneai.URL.rsplit(":", 1)[1])):
+            async with aiohttp.ClientSession() as session:
+                results = []
+                for text in texts:
+                    try:
+                        results.append(
+                            await post_pipeline(
+                                session,
+                                Input.wrap(text),
+                                [oneai.skills.Keywords()],
+                                "key",
+                                False,
+                                cache_mode=cache_mode,
+                            )
+                        )
+                    except oneai.exceptions.OneAIError as e:
+                        results.append(e)
+                return results
+
+    return asyncio.run(run_all())
+
+
+def test_cache_on(posts):
+    first, second, other = run(posts, ["text", "text", "other"], "on")
+    assert posts == ["text", "other"]
+    assert first is not second  # rebuilt from the cached body
+    assert second.text == "text" and second.keywords == []
+    assert second.task_id == "request-id"
+    assert other.text == "other"
+
+
+def test_cache_off(posts):
+    run(posts, ["text", "text"], "off")
+    assert posts == ["text", "text"]
+    assert len(response_cache) == 0
+
+
+def test_cache_write_only(posts):
+    run(posts, ["text", "text"], "write_only")
+    assert posts == ["text", "text"]
+    assert len(response_cache) == 1
+    (output,) = run(posts, ["text"], "read_only")
+    assert posts == ["text", "text"]
+    assert output.text == "text"
+
+
+def test_cache_read_only(posts):
+    run(posts, ["text", "text"], "read_only")
+    assert posts == ["text", "text"]
+    assert len(response_cache) == 0
+
+
+def test_cache_skips_errors(posts):
+    first, second = run(posts, ["FAIL", "FAIL"], "on")
+    assert isinstance(first, oneai.exceptions.InputError)
+    assert isinstance(second, oneai.exceptions.InputError)
+    assert posts == ["FAIL", "FAIL"]
+    assert len(response_cache) == 0
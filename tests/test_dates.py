@@ -0,0 +1,17 @@
+from datetime import datetime
+
+import pytest
+from oneai.api.clustering import format_date
+
+
+def test_format_date():
+    assert format_date("2023-01-05") == "2023-01-05"
+    assert format_date("2023-1-5") == "2023-01-05"
+    assert format_date(datetime(2023, 1, 5, 12, 30)) == "2023-01-05"
+    assert format_date("05/01/2023", "%d/%m/%Y") == "2023-01-05"
+
+
+@pytest.mark.parametrize("date", ["2023-02-30", "2023-13-01", "yesterday"])
+def test_format_date_invalid(date):
+    with pytest.raises(ValueError):
+        format_date(date)
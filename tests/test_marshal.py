@@ -0,0 +1,84 @@
+import oneai
+import oneai.process_scheduler as scheduler
+from oneai.classes import Input, Label
+from tests.util import process_batch, word_labels
+
+
+def test_demarshal_shifts_spans():
+    skill = oneai.skills.Keywords()
+    inputs = [Input.wrap("hello world"), Input.wrap("foo bar")]
+    marshaled = scheduler._marshal(inputs)
+    assert marshaled.text == "hello world" + scheduler.MARSHAL_SEPARATOR + "foo bar"
+
+    labels = word_labels(marshaled.text, skill)
+    topic = Label(type="topic", skill=skill.api_name, name="greeting")  # no spans
+    labels.append(topic)
+    outputs = scheduler._demarshal(
+        oneai.Output(marshaled.text, [skill], [labels]), inputs
+    )
+
+    assert [output.text for output in outputs] == ["hello world", "foo bar"]
+    for input, output in zip(inputs, outputs):
+        for label in output.keywords[:-1]:
+            (span,) = label.output_spans
+            assert input.text[span.start : span.end] == label.span_text
+            (span,) = label.input_spans
+            assert input.text[span.start : span.end] == label.span_text
+            assert input.text[label._span[0] : label._span[1]] == label.span_text
+        assert output.keywords[-1] is topic  # can't be attributed, added to all
+    assert outputs[1].keywords.names == ["foo", "bar", "greeting"]
+
+
+def test_marshal_only_plain_articles(api):
+    articles = [Input.wrap("one two"), Input.wrap("three"), Input.wrap("four")]
+    others = [
+        Input("five six", type="conversation", content_type="text/plain"),
+        Input("seven", type="article", content_type="text/plain", metadata={"a": 1}),
+        Input.wrap("https://example.com/article"),
+    ]
+    outputs, errors, summary = process_batch(
+        articles + others, [oneai.skills.Keywords()], marshal_rows=3
+    )
+    requests = api.inputs
+
+    assert len(requests) == 4
+    assert all(input in requests for input in others)  # sent as they are
+    (marshaled,) = [input for input in requests if input not in others]
+    assert marshaled.text == scheduler.MARSHAL_SEPARATOR.join(
+        ["one two", "three", "four"]
+    )
+    assert summary.successful == 6 and not errors
+    assert outputs[articles[0]].keywords.names == ["one", "two"]
+    assert outputs[articles[2]].keywords.names == ["four"]
+    assert outputs[others[0]].keywords.names == ["five", "six"]
+
+
+def test_no_marshal_with_clustering(api):
+    batch = [Input.wrap("one"), Input.wrap("two")]
+    process_batch(
+        batch,
+        [oneai.skills.Keywords(), oneai.skills.Clustering(collection="c")],
+        marshal_rows=2,
+    )
+    assert api.inputs == batch
+
+
+def test_callback_error_reported_once(api):
+    batch = [Input.wrap("one"), Input.wrap("two"), Input.wrap("three")]
+    delivered, errors = [], []
+
+    def on_output(input, output):
+        if input.text == "two":
+            raise RuntimeError("callback failed")
+        delivered.append(input.text)
+
+    _, _, summary = process_batch(
+        batch,
+        [oneai.skills.Keywords()],
+        marshal_rows=3,
+        on_output=on_output,
+        on_error=lambda input, e: errors.append((input.text, str(e))),
+    )
+    assert delivered == ["one", "three"]
+    assert errors == [("two", "callback failed")]
+    assert (summary.successful, summary.failed) == (2, 1)
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from oneai.api import clustering
+
+
+def fake_pages(monkeypatch, total_pages=3, page_size=2, blocked=None):
+    # page `p` has the items p * 10, p * 10 + 1, ...; requests for pages in `blocked` wait for its event
+    requested = []
+    started = {page: threading.Event() for page in range(total_pages)}
+
+    def get_clustering(path, params, api_key=None, *, headers=None):
+        page = params["page"]
+        requested.append(page)
+        started[page].set()
+        if blocked and page in blocked:
+            blocked[page].wait(5)
+        items = [page * 10 + i for i in range(page_size)]
+        return {"items": items, "total_pages": total_pages}
+
+    monkeypatch.setattr(clustering, "get_clustering", get_clustering)
+    return requested, started
+
+
+def paginate(**kwargs):
+    return clustering.get_clustering_paginated(
+        "path", "key", "items", None, lambda item: item, **kwargs
+    )
+
+
+def test_pages_in_order(monkeypatch):
+    requested, _ = fake_pages(monkeypatch)
+    assert list(paginate()) == [0, 1, 10, 11, 20, 21]
+    assert requested == [0, 1, 2]
+
+
+def test_pages_limit(monkeypatch):
+    requested, _ = fake_pages(monkeypatch, total_pages=10)
+    assert list(paginate(limit=3)) == [0, 1, 10, 11]
+    assert requested == [0, 1]
+
+
+def test_next_page_prefetched(monkeypatch):
+    release = threading.Event()
+    requested, started = fake_pages(monkeypatch, blocked={1: release})
+    pages = paginate()
+    assert next(pages) == 0
+    assert next(pages) == 1
+    # requested in the background, before the first page is consumed
+    assert started[1].wait(1)
+    release.set()
+    assert list(pages) == [10, 11, 20, 21]
+    assert requested == [0, 1, 2]
+
+
+def test_close_while_prefetching(monkeypatch):
+    release = threading.Event()
+    requested, _ = fake_pages(monkeypatch, blocked={1: release})
+    pages = paginate()
+    assert next(pages) == 0
+    start = time.monotonic()
+    pages.close()
+    assert time.monotonic() - start < 1  # doesn't wait for the prefetched page
+    release.set()
+    assert 2 not in requested
@@ -0,0 +1,34 @@
+import asyncio
+import gc
+
+import oneai
+import oneai.process_scheduler as scheduler
+
+
+def test_monitor_released_with_loop(monkeypatch):
+    polls = []
+
+    async def process_task_status(task_id, session, api_key, steps):
+        polls.append(task_id)
+        if polls.count(task_id) < 2:
+            return "RUNNING", None
+        return scheduler.STATUS_COMPLETED, oneai.Output(task_id)
+
+    monkeypatch.setattr(scheduler, "process_task_status", process_task_status)
+
+    async def poll(task_ids):
+        outputs = await asyncio.gather(
+            *(
+                scheduler.task_polling(task_id, object(), "key", [], 0.01)
+                for task_id in task_ids
+            )
+        )
+        return [output.text for output in outputs]
+
+    for _ in range(5):
+        polls.clear()
+        assert asyncio.run(poll(["a", "b"])) == ["a", "b"]
+        assert sorted(polls) == ["a", "a", "b", "b"]  # polled until completed
+    gc.collect()
+    assert len(scheduler._monitors) == 0
+    assert not any(isinstance(o, scheduler.TaskMonitor) for o in gc.get_objects())
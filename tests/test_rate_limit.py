@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+import oneai
+import oneai.process_scheduler as scheduler
+from oneai.classes import Input
+from oneai.exceptions import (
+    RateLimitError,
+    ServerError,
+    handle_unsuccessful_response,
+)
+from oneai.process_scheduler import TokenBucket
+from tests.util import process_batch, word_output
+
+
+def acquire_all(bucket: TokenBucket, n: int, pause: float = 0) -> float:
+    # returns the seconds taken to acquire `n` tokens
+    async def acquire():
+        if pause:
+            bucket.pause(pause)
+        start = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    return asyncio.run(acquire())
+
+
+def test_token_bucket_rate():
+    assert acquire_all(TokenBucket(20, capacity=1), 5) >= 0.19  # 4 waits of 0.05s
+
+
+def test_token_bucket_burst():
+    assert acquire_all(TokenBucket(1, capacity=5), 5) < 0.5
+
+
+def test_token_bucket_pause():
+    assert acquire_all(TokenBucket(), 3) < 0.1  # unlimited
+    assert acquire_all(TokenBucket(), 3, pause=0.2) >= 0.2
+
+
+def rate_limited(api, limited: int, retry_after: float = None):
+    # the first `limited` requests of each input are rejected with a rate limit error
+    def respond(input, skills):
+        sent = [request.input.text for request in api.requests]
+        if sent.count(input.text) <= limited:
+            raise RateLimitError(42900, "rate limited", retry_after=retry_after)
+        return word_output(input, skills)
+
+    api.respond = respond
+
+
+def test_retry_after(api):
+    rate_limited(api, limited=1, retry_after=0.2)
+    outputs, errors, summary = process_batch(
+        [Input.wrap("one")], [oneai.skills.Keywords()]
+    )
+    assert [input.text for input in api.inputs] == ["one", "one"]
+    assert api.requests[1].time - api.requests[0].time >= 0.2
+    assert summary.successful == 1 and not errors
+
+
+def test_retry_limit(api, monkeypatch):
+    monkeypatch.setattr(scheduler, "RATE_LIMIT_RETRIES", 2)
+    rate_limited(api, limited=5, retry_after=0)
+    outputs, errors, summary = process_batch(
+        [Input.wrap("one")], [oneai.skills.Keywords()]
+    )
+    assert len(api.requests) == 3
+    assert (summary.successful, summary.failed) == (0, 1)
+    (error,) = errors.values()
+    assert isinstance(error, RateLimitError)
+
+
+def test_rate_limit_error_is_server_error():
+    with pytest.raises(ServerError) as info:  # handlers written for earlier versions
+        asyncio.run(
+            handle_unsuccessful_response({"status_code": 42900, "message": "slow"})
+        )
+    assert isinstance(info.value, RateLimitError)
+    assert info.value.status_code == 42900
@@ -0,0 +1,126 @@
+import copy
+import json
+import pickle
+from datetime import timedelta
+
+import oneai
+from oneai.api.pipeline import build_request
+from oneai.classes import SkillParams
+
+
+def test_conversation_modified_in_place():
+    input = oneai.Input.wrap(
+        [
+            oneai.Utterance("a", "hello"),
+            oneai.Utterance(None, "hi", timedelta(seconds=1)),
+        ]
+    )
+    steps = [oneai.skills.Keywords()]
+    request = json.loads(build_request(input, steps, False, True))
+    assert request["input"] == [
+        {"speaker": "a", "utterance": "hello"},
+        {"utterance": "hi", "timestamp": "0:00:01"},
+    ]
+
+    input.text[0].utterance = "changed"
+    request = json.loads(build_request(input, steps, False, True))
+    assert request["input"][0]["utterance"] == "changed"
+
+
+def test_steps_json_updated():
+    skill = oneai.skills.Keywords()
+    pipeline = oneai.Pipeline([skill, oneai.skills.Names()])
+    steps = json.loads(pipeline._serialize_steps())
+    assert [step["skill"] for step in steps] == ["keywords", "names"]
+    assert pipeline._serialize_steps() is pipeline._serialize_steps()
+
+    skill.api_name = "keywords-v2"
+    assert json.loads(pipeline._serialize_steps())[0]["skill"] == "keywords-v2"
+
+    skill.params["max_keywords"] = 3
+    assert json.loads(pipeline._serialize_steps())[0]["params"] == {"max_keywords": 3}
+
+    pipeline.steps = pipeline.steps[1:]
+    assert [step["skill"] for step in json.loads(pipeline._serialize_steps())] == [
+        "names"
+    ]
+
+
+def test_skill_params_revision():
+    params = SkillParams(a=1)
+    revisions = {params.revision}
+    for modify in [
+        lambda: params.__setitem__("b", 2),
+        lambda: params.update(c=3),
+        lambda: params.setdefault("d", 4),
+        lambda: params.pop("d"),
+        lambda: params.__delitem__("c"),
+        lambda: params.popitem(),
+        lambda: params.clear(),
+    ]:
+        modify()
+        assert params.revision not in revisions
+        revisions.add(params.revision)
+
+    params["a"] = 1
+    for clone in [
+        copy.copy(params),
+        copy.deepcopy(params),
+        pickle.loads(pickle.dumps(params)),
+    ]:
+        assert clone == params and clone.revision not in revisions
+        revisions.add(clone.revision)
+        clone["a"] = 2
+        assert params["a"] == 1
+
+
+def test_skill_json_updated():
+    skill = oneai.skills.Summarize()
+    assert isinstance(skill.params, SkillParams)
+    assert json.loads(skill._json())["skill"] == "summarize"
+    assert skill._json() is skill._json()
+
+    def max_length(skill):
+        return json.loads(skill._json())["params"].get("max_length")
+
+    skill.max_length = 3
+    assert max_length(skill) == 3
+    skill.params["max_length"] = 5
+    assert max_length(skill) == 5
+    skill.params = {"max_length": 7}
+    assert isinstance(skill.params, SkillParams)
+    assert max_length(skill) == 7
+    skill.api_name = "summarize-v2"
+    assert json.loads(skill._json())["skill"] == "summarize-v2"
+
+    clone = copy.deepcopy(skill)
+    clone.max_length = 9
+    assert max_length(skill) == 7 and max_length(clone) == 9
+
+
+def test_skill_json_unsupported_params():
+    skill = oneai.skills.CollectionInsert(
+        collection="c", input_skill=oneai.skills.Sentiments()
+    )
+    skill.params["interval"] = timedelta(minutes=1)
+    assert json.loads(skill._json())["params"] == {
+        "collection": "c",
+        "input_skill": "sentiments",
+        "interval": "0:01:00",
+    }
+
+
+def test_wrap_url_sniff():
+    import validators
+
+    texts = [
+        "https://example.com/article",
+        "re://x",
+        "re: the meeting",
+        "see https://example.com",
+        "x" * 20 + "://example.com",
+    ]
+    for text in texts:  # same as validating every text
+        expected = "text/uri-list" if validators.url(text) else "text/plain"
+        assert oneai.Input.wrap(text).content_type == expected
+    assert oneai.Input.wrap("re://x").content_type == "text/plain"
@@ -0,0 +1,68 @@
+import asyncio
+import gc
+
+import oneai.api.pipeline
+
+
+def _live_loops() -> int:
+    gc.collect()
+    return sum(isinstance(o, asyncio.AbstractEventLoop) for o in gc.get_objects())
+
+
+def test_session_released_with_loop():
+    sessions = []
+
+    async def use_session():
+        sessions.append(oneai.api.pipeline.get_session())
+
+    # the session of the background loop used by sync calls is kept for the process lifetime
+    open_sessions = len(oneai.api.pipeline._sessions)
+    before = _live_loops()
+    for _ in range(5):
+        asyncio.run(use_session())
+    assert all(session.closed for session in sessions)
+    sessions.clear()  # sessions reference their loop
+    assert len(oneai.api.pipeline._sessions) == open_sessions
+    assert _live_loops() <= before
+
+
+def test_session_replaced_after_close():
+    open_sessions = len(oneai.api.pipeline._sessions)
+
+    async def reopen():
+        first = oneai.api.pipeline.get_session()
+        await first.close()
+        second = oneai.api.pipeline.get_session()
+        assert second is not first and not second.closed
+        await asyncio.sleep(0)  # let the first keeper task finish
+        assert oneai.api.pipeline._sessions[asyncio.get_running_loop()][0] is second
+        return second
+
+    assert asyncio.run(reopen()).closed
+    assert len(oneai.api.pipeline._sessions) == open_sessions
+
+
+def test_no_pending_task_on_user_loop():
+    async def use_session():
+        return oneai.api.pipeline.get_session()
+
+    loop = asyncio.new_event_loop()
+    try:
+        session = loop.run_until_complete(use_session())
+        # nothing left pending for a loop closed without shutting it down
+        assert not asyncio.all_tasks(loop)
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        assert session.closed
+        assert loop not in oneai.api.pipeline._sessions
+    finally:
+        loop.close()
+
+
+def test_close_session():
+    async def close():
+        session = oneai.api.pipeline.get_session()
+        await oneai.api.pipeline.close_session()
+        assert session.closed
+        assert asyncio.get_running_loop() not in oneai.api.pipeline._sessions
+
+    asyncio.run(close())
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+import oneai
+import oneai.process_scheduler as scheduler
+from oneai.classes import Input, Label
+from tests.util import word_output
+
+
+def topic_output(input, skills):
+    # adds a label without spans for "topic" inputs, which can't be attributed to a coalesced input
+    output = word_output(input, skills)
+    if isinstance(input.text, str) and "topic" in input.text:
+        output.keywords.append(
+            Label(type="topic", skill=skills[0].api_name, name=input.text)
+        )
+    return output
+
+
+def submit_all(pipeline: oneai.Pipeline, inputs):
+    async def submit():
+        return await asyncio.gather(*(pipeline.submit(input) for input in inputs))
+
+    return asyncio.run(submit())
+
+
+def test_submit_not_coalesced_by_default(api):
+    pipeline = oneai.Pipeline([oneai.skills.Keywords()])
+    outputs = submit_all(pipeline, ["one two", "three"])
+    assert [input.text for input in api.inputs] == ["one two", "three"]
+    assert [output.keywords.names for output in outputs] == [["one", "two"], ["three"]]
+
+
+def test_submit_coalesced(api):
+    pipeline = oneai.Pipeline([oneai.skills.Keywords()], coalesce_inputs=True)
+    texts = ["one two", "three", "four five six"]
+    outputs = submit_all(pipeline, texts)
+
+    assert len(api.requests) == 1
+    assert api.inputs[0].text == scheduler.MARSHAL_SEPARATOR.join(texts)
+    for text, output in zip(texts, outputs):
+        assert output.text == text
+        assert output.keywords.names == text.split()
+        for label in output.keywords:
+            span = label.output_spans[0]
+            assert text[span.start : span.end] == label.span_text
+
+
+def test_submit_unattributable_labels_sent_separately(api):
+    api.respond = topic_output
+    pipeline = oneai.Pipeline([oneai.skills.Keywords()], coalesce_inputs=True)
+    texts = ["first topic", "second topic"]
+    outputs = submit_all(pipeline, texts)
+
+    assert len(api.requests) == 3  # the coalesced request, then each input again
+    for text, output in zip(texts, outputs):
+        # no labels of the other caller's input
+        assert output.keywords.names == text.split() + [text]
+
+
+def test_submit_coalesces_plain_articles_only(api):
+    pipeline = oneai.Pipeline([oneai.skills.Keywords()], coalesce_inputs=True)
+    inputs = [
+        "one",
+        "two",
+        Input("three", type="article", content_type="text/plain", metadata={"a": 1}),
+        [oneai.Utterance("speaker", "four")],
+    ]
+    submit_all(pipeline, inputs)
+    assert sorted(
+        input.text if isinstance(input.text, str) else "conversation"
+        for input in api.inputs
+    ) == ["conversation", "one" + scheduler.MARSHAL_SEPARATOR + "two", "three"]
+
+
+def test_submit_coalesce_unsupported_skill(api):
+    pipeline = oneai.Pipeline([oneai.skills.Topics()], coalesce_inputs=True)
+    with pytest.raises(ValueError):
+        submit_all(pipeline, ["one"])
+    assert not api.requests
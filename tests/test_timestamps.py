@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+import pytest
+from dateutil import parser as dateutil
+from oneai.classes import timestamp_to_timedelta
+
+
+def dateutil_timedelta(timestamp: str) -> timedelta:
+    dt = dateutil.parse(timestamp)
+    return timedelta(
+        hours=dt.hour, minutes=dt.minute, seconds=dt.second, microseconds=dt.microsecond
+    )
+
+
+@pytest.mark.parametrize(
+    "timestamp, expected",
+    [
+        ("00:00:00", timedelta()),
+        ("01:02:03", timedelta(hours=1, minutes=2, seconds=3)),
+        ("1:2:3", timedelta(hours=1, minutes=2, seconds=3)),
+        ("23:59:59.5", timedelta(hours=23, minutes=59, seconds=59.5)),
+        ("00:00:01.123456789", timedelta(seconds=1, microseconds=123456)),
+    ],
+)
+def test_timestamp(timestamp, expected):
+    assert timestamp_to_timedelta(timestamp) == expected
+    assert timestamp_to_timedelta(timestamp) == dateutil_timedelta(timestamp)
+
+
+def test_timestamp_other_formats():
+    # not in the API format, parsed by dateutil
+    assert timestamp_to_timedelta("1:02 PM") == timedelta(hours=13, minutes=2)
+    assert timestamp_to_timedelta("12:30") == timedelta(hours=12, minutes=30)
+
+
+@pytest.mark.parametrize("timestamp", ["24:00:00", "10:60:00", "10:00:61", "soon"])
+def test_timestamp_invalid(timestamp):
+    with pytest.warns(UserWarning) as warnings:
+        assert timestamp_to_timedelta(timestamp) == timestamp
+        assert timestamp_to_timedelta(timestamp) == timestamp
+    assert len(warnings) == 2  # on every call, not only the first
+
+
+def test_timestamp_empty():
+    assert timestamp_to_timedelta("") is None
+    assert timestamp_to_timedelta(None) is None
@@ -1,6 +1,89 @@
+import asyncio
+import threading
+import time
+from typing import List, NamedTuple
+
+import oneai
+import oneai.process_scheduler as scheduler
+from oneai.classes import Input, Label, Labels, Span
+
+
 def hasattrnested(obj: object, attr: str):
     if "." in attr:
         parent, child = attr.split(".", 1)
         return hasattr(obj, parent) and hasattrnested(getattr(obj, parent), child)
     else:
         return hasattr(obj, attr)
+
+
+def word_labels(text: str, skill: oneai.Skill) -> Labels:
+    # a label per word, with spans like the API's
+    labels, start = Labels(), 0
+    for word in text.split():
+        start = text.index(word, start)
+        end = start + len(word)
+        labels.append(
+            Label(
+                type="keyword",
+                skill=skill.api_name,
+                name=word,
+                _span=[start, end],
+                output_spans=[Span(start, end, 0, word)],
+                input_spans=[Span(start, end, 0, word)],
+                span_text=word,
+            )
+        )
+        start = end
+    return labels
+
+
+def word_output(input: Input, skills: List[oneai.Skill]) -> oneai.Output:
+    # `word_labels` of text inputs for the first skill, no labels for conversations
+    if not isinstance(input.text, str):
+        return oneai.Output(input.text, skills, [Labels()])
+    return oneai.Output(input.text, skills, [word_labels(input.text, skills[0])])
+
+
+class Request(NamedTuple):
+    input: Input
+    kwargs: dict  # of `_run_internal`, e.g. steps_json
+    thread: str  # name of the thread that sent the request
+    time: float
+
+
+class FakeAPI:
+    """
+    Answers pipeline requests in place of `process_scheduler._run_internal` (see the `api` fixture), recording them.
+    Responds with `word_output` by default- set `respond` to a function of the input and skills to change the responses,
+    or to raise API errors.
+    """
+
+    def __init__(self):
+        self.requests: List[Request] = []
+        self.respond = word_output
+
+    @property
+    def inputs(self) -> List[Input]:
+        return [request.input for request in self.requests]
+
+    async def run_internal(self, session, input, skills, *args, **kwargs):
+        self.requests.append(
+            Request(input, kwargs, threading.current_thread().name, time.monotonic())
+        )
+        return self.respond(input, skills)
+
+
+def process_batch(batch: List[Input], steps: List[oneai.Skill], **kwargs):
+    # runs `process_batch`, collecting the outputs and errors by input unless other callbacks are passed
+    outputs, errors = {}, {}
+    summary = asyncio.run(
+        scheduler.process_batch(
+            batch,
+            steps,
+            kwargs.pop("on_output", outputs.__setitem__),
+            kwargs.pop("on_error", errors.__setitem__),
+            "key",
+            **kwargs,
+        )
+    )
+    return outputs, errors, summary